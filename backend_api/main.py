@@ -3,21 +3,54 @@ Agentic Calendar - FastAPI Backend
 Professional REST API for AI-powered meeting scheduling and Google Calendar integration
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
-load_dotenv('../.env.local')
+# Load environment files once, before any service module reads its settings.
+# Paths are relative to this file rather than the cwd; values already set win,
+# so the project-level file takes precedence over backend_api/.env.local
+_BACKEND_DIR = Path(__file__).resolve().parent
+load_dotenv(_BACKEND_DIR.parent / '.env.local')
+load_dotenv(_BACKEND_DIR / '.env.local')
 
 from routers import oauth, calendar, ai, health, demo
+from utils.orjson_response import ORJSONResponse
+from utils.http_client import get_http_client, close_http_client
+from utils.token_pool import fill_token_pool
+from utils.redis_client import init_redis, close_redis
+from utils.clock import start_clock, stop_clock
+from services.demo_service import DemoService
+from services.oauth_service import OAuthService
+from services.token_service import TokenService
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources on startup and release them on shutdown"""
+    get_http_client()
+    init_redis()
+    fill_token_pool()
+    start_clock()
+    await ai.ai_service.semantic_cache.warm_up()
+    app.state.demo = DemoService()
+    app.state.oauth = OAuthService()
+    app.state.tokens = TokenService()
+    yield
+    await close_http_client()
+    await close_redis()
+    await stop_clock()
 
 app = FastAPI(
     title="Agentic Calendar API",
     description="Professional backend API for AI-powered meeting scheduling with Google Calendar integration",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS for Streamlit frontend
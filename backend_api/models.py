@@ -3,10 +3,12 @@ Pydantic models for TailorTalk API
 Defines request/response schemas for all endpoints
 """
 
+from dataclasses import dataclass
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Annotated
 from datetime import datetime
 from enum import Enum
+import msgspec
 
 # Base response models
 class BaseResponse(BaseModel):
@@ -21,7 +23,8 @@ class ErrorResponse(BaseModel):
     detail: Optional[str] = None
 
 # OAuth Models
-class OAuthConfig(BaseModel):
+@dataclass(slots=True)
+class OAuthConfig:
     """OAuth configuration response"""
     client_id: str
     redirect_uri: str
@@ -60,6 +63,10 @@ class CalendarEventRequest(BaseModel):
     attendees: Optional[List[str]] = []
     timezone: Optional[str] = "UTC"
 
+class CalendarEventBatchRequest(BaseModel):
+    """Batch calendar event creation request"""
+    events: List[CalendarEventRequest] = Field(..., min_length=1, max_length=100)
+
 class CalendarEventResponse(BaseModel):
     """Calendar event creation response"""
     success: bool
@@ -129,6 +136,50 @@ class MeetingExtractionRequest(BaseModel):
     """Meeting information extraction request"""
     chat_history: List[ChatMessage]
 
+# msgspec Structs for hot inbound AI payloads (decoded and validated in one pass)
+class ChatMessageStruct(msgspec.Struct, frozen=True):
+    """Chat message struct"""
+    role: MessageRole
+    content: str
+    timestamp: Optional[datetime] = None
+
+class ChatRequestStruct(msgspec.Struct):
+    """AI chat request struct, including provider switch and key test fields"""
+    message: Annotated[str, msgspec.Meta(max_length=2000)] = ""
+    chat_history: List[ChatMessageStruct] = []
+    calendar_connected: bool = False
+    session_id: Optional[Annotated[str, msgspec.Meta(max_length=128)]] = None
+    action: Optional[str] = None
+    test_mode: bool = False
+    provider: Optional[str] = None
+    api_key: Optional[str] = None
+    model: Optional[str] = None
+
+class ChatBatchItemStruct(msgspec.Struct):
+    """Single message in a batch chat request"""
+    message: Annotated[str, msgspec.Meta(max_length=2000)]
+    chat_history: List[ChatMessageStruct] = []
+
+class ChatBatchRequestStruct(msgspec.Struct):
+    """Batch AI chat request struct"""
+    items: Annotated[List[ChatBatchItemStruct], msgspec.Meta(max_length=100)]
+    calendar_connected: bool = False
+
+class SwitchProviderStruct(msgspec.Struct):
+    """AI provider switch request struct"""
+    provider: str = "demo"
+    api_key: Optional[str] = None
+    model: Optional[str] = None
+
+class ProviderTestStruct(msgspec.Struct):
+    """AI provider API key test request struct"""
+    provider: str = "demo"
+    api_key: Optional[str] = None
+
+class MeetingExtractionRequestStruct(msgspec.Struct):
+    """Meeting information extraction request struct"""
+    chat_history: List[ChatMessageStruct]
+
 class MeetingExtractionResponse(BaseModel):
     """Meeting information extraction response"""
     success: bool
@@ -136,7 +187,8 @@ class MeetingExtractionResponse(BaseModel):
     error: Optional[str] = None
 
 # Health Models
-class HealthResponse(BaseModel):
+@dataclass(slots=True)
+class HealthResponse:
     """Health check response"""
     status: str
     timestamp: datetime
@@ -144,7 +196,8 @@ class HealthResponse(BaseModel):
     services: Dict[str, str]
 
 # Session Models
-class SessionInfo(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class SessionInfo:
     """Session information"""
     session_id: str
     user_id: Optional[str] = None
@@ -2,6 +2,6 @@
 API Routers for TailorTalk Backend
 """
 
-from . import oauth, calendar, ai, health
+from . import oauth, calendar, ai, health, demo
 
-__all__ = ["oauth", "calendar", "ai", "health"]
+__all__ = ["oauth", "calendar", "ai", "health", "demo"]
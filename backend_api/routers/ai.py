@@ -3,101 +3,212 @@ AI Router for TailorTalk API
 Handles AI conversation and meeting extraction
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Request, Response, Depends
+from typing import Dict, Any, Tuple, Callable
+import hashlib
+import time
+import msgspec
+import orjson
 
 from models import (
-    ChatRequest, ChatResponse, MeetingExtractionRequest,
-    MeetingExtractionResponse, BaseResponse
+    MeetingExtractionResponse, MeetingInfo,
+    ChatRequestStruct, ChatBatchRequestStruct, MeetingExtractionRequestStruct,
+    SwitchProviderStruct, ProviderTestStruct
 )
 from services.ai_service import AIService
+from services.calendar_service import CalendarService
+from routers.calendar import get_calendar_service_with_auth, invalidate_events_cache
+from utils.orjson_response import ORJSONResponse
+from utils.sse import sse_response
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Initialize AI service
 ai_service = AIService()
 
+# SDK clients used for API key tests, keyed by (provider, api key hash)
+_PROVIDER_CLIENT_CACHE_SIZE = 64
+_provider_client_cache: Dict[Tuple[str, str], Any] = {}
+
+# Provider SDK modules, imported on first use only
+_genai = None
+_openai = None
+_anthropic = None
+
+def _ensure_genai():
+    """Import google.generativeai once"""
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        _genai = genai
+    return _genai
+
+def _ensure_openai():
+    """Import openai once"""
+    global _openai
+    if _openai is None:
+        import openai
+        _openai = openai
+    return _openai
+
+def _ensure_anthropic():
+    """Import anthropic once"""
+    global _anthropic
+    if _anthropic is None:
+        import anthropic
+        _anthropic = anthropic
+    return _anthropic
+
+def _build_provider_client(provider: str, api_key: str) -> Any:
+    """Build the SDK client used to test a provider API key"""
+    if provider == 'gemini':
+        genai = _ensure_genai()
+        genai.configure(api_key=api_key)
+        return genai.GenerativeModel('gemini-1.5-flash')
+    elif provider == 'openai':
+        return _ensure_openai().AsyncOpenAI(api_key=api_key)
+    elif provider == 'claude':
+        return _ensure_anthropic().AsyncAnthropic(api_key=api_key)
+    raise ValueError(f"Unknown provider: {provider}")
+
+def _get_provider_client(provider: str, api_key: str) -> Any:
+    """Get a cached SDK client for a provider API key"""
+    if provider == 'gemini':
+        # genai.configure() is process-wide and shared with GeminiProvider,
+        # so Gemini models are rebuilt against the key under test every time
+        return _build_provider_client(provider, api_key)
+    key = (provider, hashlib.blake2b(api_key.encode(), digest_size=8).hexdigest())
+    client = _provider_client_cache.get(key)
+    if client is None:
+        client = _build_provider_client(provider, api_key)
+        if len(_provider_client_cache) >= _PROVIDER_CLIENT_CACHE_SIZE:
+            # Evict the oldest entry
+            _provider_client_cache.pop(next(iter(_provider_client_cache)))
+        _provider_client_cache[key] = client
+    return client
+
+# Capabilities advertised by /config
+_CAPABILITIES = (
+    "natural_conversation",
+    "meeting_scheduling",
+    "information_extraction",
+    "calendar_integration"
+)
+
+# Serialized /status and /config payloads; provider state only changes on switch_provider
+_AI_INFO_CACHE_TTL = 2.0
+_ai_info_cache: Dict[str, Tuple[float, bytes]] = {}
+
+def _cached_json_response(name: str, build: Callable[[], Dict[str, Any]]) -> Response:
+    """Serve a payload from the TTL cache, rebuilding it when stale"""
+    now = time.monotonic()
+    cached = _ai_info_cache.get(name)
+    if cached is None or now - cached[0] >= _AI_INFO_CACHE_TTL:
+        cached = (now, orjson.dumps(build()))
+        _ai_info_cache[name] = cached
+    return Response(content=cached[1], media_type="application/json")
+
+def _build_ai_status() -> Dict[str, Any]:
+    """Build AI service status payload"""
+    is_configured = ai_service.is_configured()
+    return {
+        "success": is_configured,
+        "message": "AI service configured" if is_configured else "AI service not configured",
+        "current_provider": ai_service.get_current_provider_info(),
+        "model": ai_service.get_model_name()
+    }
+
 @router.get("/status")
 async def ai_status():
     """Get AI service status with provider information"""
     try:
-        is_configured = ai_service.is_configured()
-        current_provider = ai_service.get_current_provider_info()
+        return _cached_json_response("status", _build_ai_status)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
 
+def _switch_provider(provider: str, api_key: str = None, model: str = None) -> Dict[str, Any]:
+    """Switch the active AI provider"""
+    try:
+        ai_service.set_provider(provider, api_key, model)
+        _ai_info_cache.clear()
         return {
-            "success": is_configured,
-            "message": "AI service configured" if is_configured else "AI service not configured",
-            "current_provider": current_provider,
-            "model": ai_service.get_model_name()
+            "success": True,
+            "message": f"Switched to {provider}",
+            "current_provider": ai_service.get_current_provider_info()
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
+        return {
+            "success": False,
+            "error": f"Failed to switch provider: {str(e)}"
+        }
+
+async def _test_provider_key(provider: str, api_key: str = None) -> Dict[str, Any]:
+    """Test a provider API key without switching to it"""
+    try:
+        if provider == 'demo':
+            return {"success": True, "message": "Demo mode is always available"}
+        elif provider == 'gemini' and api_key:
+            model = _get_provider_client(provider, api_key)
+            response = await model.generate_content_async("Hello")
+            return {"success": True, "message": "Gemini API key is valid"}
+        elif provider == 'openai' and api_key:
+            client = _get_provider_client(provider, api_key)
+            response = await client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[{"role": "user", "content": "Hello"}],
+                max_tokens=5
+            )
+            return {"success": True, "message": "OpenAI API key is valid"}
+        elif provider == 'claude' and api_key:
+            client = _get_provider_client(provider, api_key)
+            response = await client.messages.create(
+                model="claude-3-haiku-20240307",
+                max_tokens=5,
+                messages=[{"role": "user", "content": "Hello"}]
+            )
+            return {"success": True, "message": "Claude API key is valid"}
+        else:
+            return {"success": False, "error": "Invalid provider or missing API key"}
+    except Exception as e:
+        return {"success": False, "error": f"API key test failed: {str(e)}"}
+
+@router.post("/switch-provider")
+async def switch_provider(request: Request):
+    """Switch the active AI provider"""
+    try:
+        switch_request = msgspec.json.decode(await request.body(), type=SwitchProviderStruct)
+    except msgspec.MsgspecError as e:
+        return {"success": False, "error": f"Invalid request: {str(e)}"}
+
+    return _switch_provider(switch_request.provider, switch_request.api_key, switch_request.model)
+
+@router.post("/test-key")
+async def test_provider_key(request: Request):
+    """Test a provider API key without switching to it"""
+    try:
+        test_request = msgspec.json.decode(await request.body(), type=ProviderTestStruct)
+    except msgspec.MsgspecError as e:
+        return {"success": False, "error": f"Invalid request: {str(e)}"}
+
+    return await _test_provider_key(test_request.provider, test_request.api_key)
 
 @router.post("/chat")
-async def chat(request: dict):
+async def chat(request: Request):
     """Process AI chat request with provider switching support"""
     try:
-        # Handle provider switching
-        if request.get('action') == 'switch_provider':
-            provider = request.get('provider', 'demo')
-            api_key = request.get('api_key')
-            model = request.get('model')
-
-            try:
-                ai_service.set_provider(provider, api_key, model)
-                return {
-                    "success": True,
-                    "message": f"Switched to {provider}",
-                    "current_provider": ai_service.get_current_provider_info()
-                }
-            except Exception as e:
-                return {
-                    "success": False,
-                    "error": f"Failed to switch provider: {str(e)}"
-                }
+        chat_request = msgspec.json.decode(await request.body(), type=ChatRequestStruct)
+
+        # Legacy provider switching and key testing; prefer /switch-provider and /test-key
+        if chat_request.action == 'switch_provider':
+            return _switch_provider(chat_request.provider or 'demo', chat_request.api_key, chat_request.model)
 
-        # Handle test mode
-        if request.get('test_mode'):
-            provider = request.get('provider', 'demo')
-            api_key = request.get('api_key')
-
-            # Test the provider without switching
-            try:
-                if provider == 'demo':
-                    return {"success": True, "message": "Demo mode is always available"}
-                elif provider == 'gemini' and api_key:
-                    import google.generativeai as genai
-                    genai.configure(api_key=api_key)
-                    model = genai.GenerativeModel('gemini-1.5-flash')
-                    response = model.generate_content("Hello")
-                    return {"success": True, "message": "Gemini API key is valid"}
-                elif provider == 'openai' and api_key:
-                    import openai
-                    client = openai.OpenAI(api_key=api_key)
-                    response = client.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[{"role": "user", "content": "Hello"}],
-                        max_tokens=5
-                    )
-                    return {"success": True, "message": "OpenAI API key is valid"}
-                elif provider == 'claude' and api_key:
-                    import anthropic
-                    client = anthropic.Anthropic(api_key=api_key)
-                    response = client.messages.create(
-                        model="claude-3-haiku-20240307",
-                        max_tokens=5,
-                        messages=[{"role": "user", "content": "Hello"}]
-                    )
-                    return {"success": True, "message": "Claude API key is valid"}
-                else:
-                    return {"success": False, "error": "Invalid provider or missing API key"}
-            except Exception as e:
-                return {"success": False, "error": f"API key test failed: {str(e)}"}
+        if chat_request.test_mode:
+            return await _test_provider_key(chat_request.provider or 'demo', chat_request.api_key)
 
         # Regular chat processing
-        message = request.get('message', '')
-        chat_history = request.get('chat_history', [])
-        calendar_connected = request.get('calendar_connected', False)
+        message = chat_request.message
+        chat_history = msgspec.to_builtins(chat_request.chat_history)
+        calendar_connected = chat_request.calendar_connected
 
         if not ai_service.is_configured() and ai_service.current_provider != 'demo':
             return {
@@ -108,16 +219,17 @@ async def chat(request: dict):
         result = await ai_service.get_response(
             user_message=message,
             chat_history=chat_history,
-            calendar_connected=calendar_connected
+            calendar_connected=calendar_connected,
+            session_id=chat_request.session_id
         )
 
-        return {
+        return ORJSONResponse({
             "success": True,
             "response": result.get("response", ""),
             "action": result.get("action"),
             "meeting_info": result.get("meeting_info"),
             "provider": result.get("provider")
-        }
+        })
 
     except Exception as e:
         return {
@@ -125,32 +237,91 @@ async def chat(request: dict):
             "error": f"Chat processing failed: {str(e)}"
         }
 
+@router.post("/chat/batch")
+async def chat_batch(request: Request):
+    """Process several AI chat messages concurrently"""
+    try:
+        batch_request = msgspec.json.decode(await request.body(), type=ChatBatchRequestStruct)
+
+        if not ai_service.is_configured() and ai_service.current_provider != 'demo':
+            return {
+                "success": False,
+                "error": "AI service not configured. Please configure an AI provider or use demo mode."
+            }
+
+        results = await ai_service.get_responses(
+            [(item.message, msgspec.to_builtins(item.chat_history)) for item in batch_request.items],
+            calendar_connected=batch_request.calendar_connected
+        )
+
+        return ORJSONResponse({
+            "success": True,
+            "results": [
+                {
+                    "response": result.get("response", ""),
+                    "action": result.get("action"),
+                    "meeting_info": result.get("meeting_info"),
+                    "provider": result.get("provider")
+                }
+                for result in results
+            ]
+        })
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Batch chat processing failed: {str(e)}"
+        }
+
+@router.post("/chat/stream")
+async def chat_stream(request: Request):
+    """Stream an AI chat reply as Server-Sent Events"""
+    try:
+        chat_request = msgspec.json.decode(await request.body(), type=ChatRequestStruct)
+    except msgspec.MsgspecError as e:
+        return {"success": False, "error": f"Invalid request: {str(e)}"}
+
+    if not ai_service.is_configured() and ai_service.current_provider != 'demo':
+        return {
+            "success": False,
+            "error": "AI service not configured. Please configure an AI provider or use demo mode."
+        }
+
+    return sse_response(ai_service.stream_response(
+        user_message=chat_request.message,
+        chat_history=msgspec.to_builtins(chat_request.chat_history),
+        calendar_connected=chat_request.calendar_connected
+    ))
+
 @router.post("/extract-meeting", response_model=MeetingExtractionResponse)
-async def extract_meeting_info(extraction_request: MeetingExtractionRequest):
+async def extract_meeting_info(request: Request):
     """Extract meeting information from conversation"""
     try:
+        try:
+            extraction_request = msgspec.json.decode(
+                await request.body(), type=MeetingExtractionRequestStruct
+            )
+        except msgspec.ValidationError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except msgspec.DecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+
         if not ai_service.is_configured():
             raise HTTPException(status_code=400, detail="AI service not configured")
         
         # Convert chat history to the format expected by AI service
-        chat_history = [
-            {
-                "role": msg.role.value,
-                "content": msg.content,
-                "timestamp": msg.timestamp
-            }
-            for msg in extraction_request.chat_history
-        ]
+        chat_history = msgspec.to_builtins(extraction_request.chat_history)
         
         meeting_info = await ai_service.extract_meeting_info(chat_history)
         
         if meeting_info:
-            return MeetingExtractionResponse(
+            # meeting_info is already cleaned by the AI service, so skip re-validation
+            return MeetingExtractionResponse.model_construct(
                 success=True,
-                meeting_info=meeting_info
+                meeting_info=MeetingInfo.model_construct(**meeting_info)
             )
         else:
-            return MeetingExtractionResponse(
+            return MeetingExtractionResponse.model_construct(
                 success=False,
                 error="Could not extract meeting information from conversation"
             )
@@ -161,24 +332,17 @@ async def extract_meeting_info(extraction_request: MeetingExtractionRequest):
 
 @router.post("/create-event")
 async def create_calendar_event(
+    request: Request,
     meeting_info: Dict[str, Any],
-    access_token: str
+    calendar_service: CalendarService = Depends(get_calendar_service_with_auth)
 ):
     """Create calendar event using AI-extracted meeting information"""
     try:
         if not ai_service.is_configured():
             raise HTTPException(status_code=400, detail="AI service not configured")
         
-        # Import calendar service for event creation
-        from services.calendar_service import CalendarService
-        
-        calendar_service = CalendarService()
-        
-        # Initialize calendar service with token
-        if not await calendar_service.initialize_with_token(access_token):
-            raise HTTPException(status_code=401, detail="Invalid access token")
-        
         result = await ai_service.create_calendar_event(meeting_info, calendar_service)
+        invalidate_events_cache(request.state.token_hash)
         
         return result
     except HTTPException:
@@ -186,20 +350,19 @@ async def create_calendar_event(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Event creation failed: {str(e)}")
 
+def _build_ai_config() -> Dict[str, Any]:
+    """Build AI service configuration payload"""
+    return {
+        "gemini_available": ai_service.is_configured(),
+        "model": ai_service.get_model_name(),
+        "capabilities": _CAPABILITIES
+    }
+
 @router.get("/config")
 async def get_ai_config():
     """Get AI service configuration"""
     try:
-        return {
-            "gemini_available": ai_service.is_configured(),
-            "model": ai_service.get_model_name(),
-            "capabilities": [
-                "natural_conversation",
-                "meeting_scheduling",
-                "information_extraction",
-                "calendar_integration"
-            ]
-        }
+        return _cached_json_response("config", _build_ai_config)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get AI config: {str(e)}")
 
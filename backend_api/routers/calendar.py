@@ -3,35 +3,89 @@ Calendar Router for TailorTalk API
 Handles Google Calendar operations
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Header
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
+from typing import Optional, List, Dict, Any, Tuple
 import os
+import hashlib
+import time
+from cachetools import TTLCache
 from datetime import datetime, timedelta
+import orjson
 
 from models import (
-    CalendarEventRequest, CalendarEventResponse, CalendarEventsResponse,
+    CalendarEventRequest, CalendarEventBatchRequest, CalendarEventResponse, CalendarEventsResponse,
     CalendarEvent, BaseResponse, ErrorResponse
 )
-from services.calendar_service import CalendarService
+from services.calendar_service import CalendarService, CalendarAuthError
 from services.auth_service import get_current_user_tokens
+from utils.orjson_response import ORJSONResponse
+from utils.msgpack_response import negotiated_response
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
-# Initialize calendar service
-calendar_service = CalendarService()
+# Initialized calendar services keyed by token hash; entries are re-verified with Google
+# after the TTL, well within an access token's one-hour lifetime, and dropped on a 401
+_SERVICE_POOL_SIZE = 256
+_SERVICE_POOL_TTL_SECONDS = 300
+_service_pool: "TTLCache[str, CalendarService]" = TTLCache(maxsize=_SERVICE_POOL_SIZE, ttl=_SERVICE_POOL_TTL_SECONDS)
 
-async def get_calendar_service_with_auth(authorization: Optional[str] = Header(None)):
+# Short-lived list_events cache:
+# (token hash, time_min, time_max, max_results) -> (stored at, payload, JSON body)
+_EVENTS_CACHE_TTL = 20.0
+_EVENTS_CACHE_SIZE = 1024
+_events_cache: Dict[Tuple, Tuple[float, Dict[str, Any], bytes]] = {}
+
+def _token_hash(access_token: str) -> str:
+    """Hash an access token for use as a cache key"""
+    return hashlib.blake2b(access_token.encode(), digest_size=8).hexdigest()
+
+def _store_events(key: Tuple, payload: Dict[str, Any]) -> bytes:
+    """Cache a list_events payload and return its JSON body"""
+    now = time.monotonic()
+    if len(_events_cache) >= _EVENTS_CACHE_SIZE:
+        # Drop stale entries first, then the oldest if still full
+        for stale in [k for k, v in _events_cache.items() if now - v[0] >= _EVENTS_CACHE_TTL]:
+            del _events_cache[stale]
+        if len(_events_cache) >= _EVENTS_CACHE_SIZE:
+            _events_cache.pop(next(iter(_events_cache)))
+    body = orjson.dumps(payload)
+    _events_cache[key] = (now, payload, body)
+    return body
+
+def invalidate_events_cache(token_hash: str):
+    """Drop cached event lists for a token after a write"""
+    for key in [k for k in _events_cache if k[0] == token_hash]:
+        del _events_cache[key]
+
+def _auth_failed(request: Request) -> HTTPException:
+    """Forget a service whose token Google rejected and report it as unauthorized"""
+    token_hash = request.state.token_hash
+    _service_pool.pop(token_hash, None)
+    invalidate_events_cache(token_hash)
+    return HTTPException(status_code=401, detail="Invalid or expired access token")
+
+async def get_calendar_service_with_auth(request: Request, authorization: Optional[str] = Header(None)):
     """Dependency to get calendar service with authentication"""
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
     
     access_token = authorization.split(" ")[1]
+    token_hash = _token_hash(access_token)
+    request.state.token_hash = token_hash
+    
+    # Reuse the service already initialized for this token
+    service = _service_pool.get(token_hash)
+    if service is not None:
+        return service
     
-    # Initialize calendar service with token
-    if not await calendar_service.initialize_with_token(access_token):
+    # Probe Google on a pool miss so invalid tokens are rejected up front; this also caches the timezone
+    service = CalendarService()
+    if not await service.initialize_with_token(access_token, verify=True):
         raise HTTPException(status_code=401, detail="Invalid or expired access token")
     
-    return calendar_service
+    _service_pool[token_hash] = service
+    
+    return service
 
 @router.get("/status", response_model=BaseResponse)
 async def calendar_status():
@@ -44,12 +98,16 @@ async def calendar_status():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Calendar service error: {str(e)}")
 
-@router.post("/events", response_model=CalendarEventResponse)
+@router.post("/events")
 async def create_event(
+    request: Request,
     event_request: CalendarEventRequest,
     service: CalendarService = Depends(get_calendar_service_with_auth)
 ):
-    """Create a new calendar event"""
+    """Create a new calendar event
+
+    Returns the CalendarEventResponse fields as produced by the calendar service.
+    """
     try:
         result = await service.create_event(
             title=event_request.title,
@@ -59,13 +117,47 @@ async def create_event(
             attendees=event_request.attendees,
             timezone=event_request.timezone
         )
+        invalidate_events_cache(request.state.token_hash)
         
-        return CalendarEventResponse(**result)
+        return ORJSONResponse(result)
+    except CalendarAuthError:
+        raise _auth_failed(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create event: {str(e)}")
 
-@router.get("/events", response_model=CalendarEventsResponse)
+@router.post("/events/batch")
+async def create_events_batch(
+    request: Request,
+    batch_request: CalendarEventBatchRequest,
+    service: CalendarService = Depends(get_calendar_service_with_auth)
+):
+    """Create several calendar events in one batched Google API request
+
+    Returns one CalendarEventResponse-shaped result per event, in request order.
+    """
+    try:
+        results = await service.create_events_batch([
+            {
+                "title": event.title,
+                "start_time": event.start_time,
+                "end_time": event.end_time,
+                "description": event.description,
+                "attendees": event.attendees,
+                "timezone": event.timezone
+            }
+            for event in batch_request.events
+        ])
+        invalidate_events_cache(request.state.token_hash)
+        
+        return ORJSONResponse({"success": all(result["success"] for result in results), "results": results})
+    except CalendarAuthError:
+        raise _auth_failed(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create events: {str(e)}")
+
+@router.get("/events")
 async def list_events(
+    request: Request,
     time_min: Optional[datetime] = None,
     time_max: Optional[datetime] = None,
     max_results: int = 10,
@@ -73,6 +165,17 @@ async def list_events(
 ):
     """List calendar events"""
     try:
+        # Key on the requested range, so default ranges share one entry
+        cache_key = (
+            request.state.token_hash,
+            time_min.timestamp() if time_min else None,
+            time_max.timestamp() if time_max else None,
+            max_results
+        )
+        cached = _events_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < _EVENTS_CACHE_TTL:
+            return negotiated_response(request, cached[1], json_body=cached[2])
+
         # Set default time range if not provided
         if not time_min:
             time_min = datetime.now()
@@ -85,15 +188,17 @@ async def list_events(
             max_results=max_results
         )
         
-        return CalendarEventsResponse(
-            success=True,
-            events=events
-        )
+        # Events are already plain dicts from the service, so skip response validation
+        payload = {"success": True, "events": events}
+        return negotiated_response(request, payload, json_body=_store_events(cache_key, payload))
+    except CalendarAuthError:
+        raise _auth_failed(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list events: {str(e)}")
 
 @router.get("/events/{event_id}")
 async def get_event(
+    request: Request,
     event_id: str,
     service: CalendarService = Depends(get_calendar_service_with_auth)
 ):
@@ -107,16 +212,22 @@ async def get_event(
         return event
     except HTTPException:
         raise
+    except CalendarAuthError:
+        raise _auth_failed(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get event: {str(e)}")
 
-@router.put("/events/{event_id}", response_model=CalendarEventResponse)
+@router.put("/events/{event_id}")
 async def update_event(
+    request: Request,
     event_id: str,
     event_request: CalendarEventRequest,
     service: CalendarService = Depends(get_calendar_service_with_auth)
 ):
-    """Update a calendar event"""
+    """Update a calendar event
+
+    Returns the CalendarEventResponse fields as produced by the calendar service.
+    """
     try:
         result = await service.update_event(
             event_id=event_id,
@@ -127,19 +238,24 @@ async def update_event(
             attendees=event_request.attendees,
             timezone=event_request.timezone
         )
+        invalidate_events_cache(request.state.token_hash)
         
-        return CalendarEventResponse(**result)
+        return ORJSONResponse(result)
+    except CalendarAuthError:
+        raise _auth_failed(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update event: {str(e)}")
 
 @router.delete("/events/{event_id}", response_model=BaseResponse)
 async def delete_event(
+    request: Request,
     event_id: str,
     service: CalendarService = Depends(get_calendar_service_with_auth)
 ):
     """Delete a calendar event"""
     try:
         success = await service.delete_event(event_id)
+        invalidate_events_cache(request.state.token_hash)
         
         if success:
             return BaseResponse(success=True, message="Event deleted successfully")
@@ -147,11 +263,14 @@ async def delete_event(
             raise HTTPException(status_code=400, detail="Failed to delete event")
     except HTTPException:
         raise
+    except CalendarAuthError:
+        raise _auth_failed(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete event: {str(e)}")
 
 @router.get("/events/recent/{hours}")
 async def get_recent_events(
+    request: Request,
     hours: int = 24,
     service: CalendarService = Depends(get_calendar_service_with_auth)
 ):
@@ -159,15 +278,15 @@ async def get_recent_events(
     try:
         events = await service.get_recent_events(hours)
         
-        return CalendarEventsResponse(
-            success=True,
-            events=events
-        )
+        return ORJSONResponse({"success": True, "events": events})
+    except CalendarAuthError:
+        raise _auth_failed(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get recent events: {str(e)}")
 
 @router.post("/events/{event_id}/verify", response_model=BaseResponse)
 async def verify_event(
+    request: Request,
     event_id: str,
     service: CalendarService = Depends(get_calendar_service_with_auth)
 ):
@@ -179,11 +298,14 @@ async def verify_event(
             success=exists,
             message="Event exists" if exists else "Event not found"
         )
+    except CalendarAuthError:
+        raise _auth_failed(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to verify event: {str(e)}")
 
 @router.get("/free-busy")
 async def get_free_busy(
+    request: Request,
     time_min: datetime,
     time_max: datetime,
     service: CalendarService = Depends(get_calendar_service_with_auth)
@@ -191,17 +313,22 @@ async def get_free_busy(
     """Get free/busy information for a time range"""
     try:
         free_busy = await service.get_free_busy(time_min, time_max)
-        return free_busy
+        return negotiated_response(request, free_busy)
+    except CalendarAuthError:
+        raise _auth_failed(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get free/busy info: {str(e)}")
 
 @router.get("/calendars")
 async def list_calendars(
+    request: Request,
     service: CalendarService = Depends(get_calendar_service_with_auth)
 ):
     """List user's calendars"""
     try:
         calendars = await service.list_calendars()
         return {"success": True, "calendars": calendars}
+    except CalendarAuthError:
+        raise _auth_failed(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list calendars: {str(e)}")
@@ -3,63 +3,104 @@ Health Router for TailorTalk API
 Provides health check and status endpoints
 """
 
-from fastapi import APIRouter
-from datetime import datetime
+from fastapi import APIRouter, Request, Response
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Tuple
+import asyncio
 import os
+import time
+import orjson
 
 from models import HealthResponse
+from utils import ORJSONResponse, StaticPayload, get_redis, static_json_response, now_iso, now_json
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+_VERSION = StaticPayload.build({
+    "version": "1.0.0",
+    "api_name": "TailorTalk API",
+    "description": "Backend API for TailorTalk AI Calendar Assistant"
+})
+
+def _env_configured(name: str, placeholder: str) -> bool:
+    """Check that an environment variable is set to a non-placeholder value"""
+    value = os.getenv(name)
+    return bool(value and value != placeholder)
+
+# Environment does not change for the life of the process, so probe it once
+_OAUTH_CFG = bool(
+    os.getenv('GOOGLE_CLIENT_SECRET') and
+    _env_configured('GOOGLE_CLIENT_ID', 'your_google_client_id_here')
+)
+_GEMINI_CFG = _env_configured('GEMINI_API_KEY', 'your_gemini_api_key_here')
+_ENC_CFG = _env_configured('ENCRYPTION_KEY', 'your_encryption_key_here')
+
+_HEALTH_HEAD = b'{"timestamp":'
+
+# Reachability probes for backing services, keyed by the name reported in
+# "services"; results are cached so load balancer bursts don't fan out
+_PROBE_TTL = 30.0
+_PROBE_TIMEOUT = 0.2
+_probe_cache: Dict[str, Tuple[float, bool]] = {}
+
+async def _probe_redis() -> bool:
+    """Check that the shared Redis client answers PING"""
+    return bool(await get_redis().ping())
+
+async def _cached_probe(name: str, probe: Callable[[], Awaitable[bool]]) -> bool:
+    """Run a probe with a short timeout, reusing its result for _PROBE_TTL seconds"""
+    now = time.monotonic()
+    cached = _probe_cache.get(name)
+    if cached is not None and now - cached[0] < _PROBE_TTL:
+        return cached[1]
+
+    try:
+        ok = await asyncio.wait_for(probe(), _PROBE_TIMEOUT)
+    except Exception:
+        ok = False
+    _probe_cache[name] = (now, ok)
+    return ok
+
+@lru_cache(maxsize=16)
+def _health_tail(probe_results: Tuple[Tuple[str, bool], ...] = ()) -> bytes:
+    """Serialized remainder of the health payload; only the timestamp varies per request"""
+    services = {
+        "oauth": "configured" if _OAUTH_CFG else "not_configured",
+        "gemini": "configured" if _GEMINI_CFG else "not_configured",
+        "encryption": "configured" if _ENC_CFG else "not_configured"
+    }
+    for name, ok in probe_results:
+        services[name] = "reachable" if ok else "unreachable"
+
+    healthy = _OAUTH_CFG and _GEMINI_CFG and _ENC_CFG and all(ok for _, ok in probe_results)
+    return b"," + orjson.dumps({
+        "status": "healthy" if healthy else "degraded",
+        "version": "1.0.0",
+        "services": services
+    })[1:]
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    # Check service statuses
-    services = {}
-    
-    # Check OAuth configuration
-    oauth_configured = bool(
-        os.getenv('GOOGLE_CLIENT_ID') and 
-        os.getenv('GOOGLE_CLIENT_SECRET') and
-        os.getenv('GOOGLE_CLIENT_ID') != 'your_google_client_id_here'
-    )
-    services["oauth"] = "configured" if oauth_configured else "not_configured"
-    
-    # Check Gemini AI configuration
-    gemini_configured = bool(
-        os.getenv('GEMINI_API_KEY') and
-        os.getenv('GEMINI_API_KEY') not in ['your_gemini_api_key_here']
-    )
-    services["gemini"] = "configured" if gemini_configured else "not_configured"
-    
-    # Check encryption key
-    encryption_configured = bool(
-        os.getenv('ENCRYPTION_KEY') and 
-        os.getenv('ENCRYPTION_KEY') != 'your_encryption_key_here'
-    )
-    services["encryption"] = "configured" if encryption_configured else "not_configured"
-    
-    # Overall status
-    all_configured = oauth_configured and gemini_configured and encryption_configured
-    status = "healthy" if all_configured else "degraded"
-    
-    return HealthResponse(
-        status=status,
-        timestamp=datetime.now(),
-        version="1.0.0",
-        services=services
-    )
+    probes = {}
+    if get_redis() is not None:
+        probes["redis"] = _probe_redis
+
+    if probes:
+        results = await asyncio.gather(*(_cached_probe(name, probe) for name, probe in probes.items()))
+        tail = _health_tail(tuple(zip(probes, results)))
+    else:
+        tail = _health_tail()
+
+    body = b"".join((_HEALTH_HEAD, now_json(), tail))
+    return Response(content=body, media_type="application/json")
 
 @router.get("/ping")
 async def ping():
     """Simple ping endpoint"""
-    return {"message": "pong", "timestamp": datetime.now()}
+    return ORJSONResponse({"message": "pong", "timestamp": now_iso()})
 
 @router.get("/version")
-async def version():
+async def version(request: Request):
     """API version information"""
-    return {
-        "version": "1.0.0",
-        "api_name": "TailorTalk API",
-        "description": "Backend API for TailorTalk AI Calendar Assistant"
-    }
+    return static_json_response(request, _VERSION)
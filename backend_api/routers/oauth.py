@@ -3,15 +3,11 @@ OAuth Router for TailorTalk API
 Handles Google OAuth 2.0 authentication flow
 """
 
-from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi import APIRouter, HTTPException, Request, Response, Depends
 from fastapi.responses import RedirectResponse
 import os
-import json
-import secrets
 import time
 from typing import Dict, Any, Optional
-import requests
-from dotenv import load_dotenv
 
 from models import (
     OAuthConfig, AuthURLResponse, TokenRequest, TokenResponse,
@@ -19,32 +15,34 @@ from models import (
 )
 from services.oauth_service import OAuthService
 from services.token_service import TokenService
+from utils import ORJSONResponse, pooled_token_urlsafe
 
-# Load environment variables
-load_dotenv('../.env.local')
+router = APIRouter(default_response_class=ORJSONResponse)
 
-router = APIRouter()
+def get_oauth_service(request: Request) -> OAuthService:
+    """Get the process-wide OAuthService created in the app lifespan"""
+    return request.app.state.oauth
 
-# Initialize services
-oauth_service = OAuthService()
-token_service = TokenService()
+def get_token_service(request: Request) -> TokenService:
+    """Get the process-wide TokenService created in the app lifespan"""
+    return request.app.state.tokens
 
 @router.get("/config", response_model=OAuthConfig)
-async def get_oauth_config():
+async def get_oauth_config(oauth_service: OAuthService = Depends(get_oauth_service)):
     """Get OAuth configuration"""
     try:
         config = oauth_service.get_config()
         return OAuthConfig(
             client_id=config["client_id"],
             redirect_uri=config["redirect_uri"],
-            scopes=config["scopes"],
+            scopes=list(config["scopes"]),
             is_configured=oauth_service.is_configured()
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get OAuth config: {str(e)}")
 
 @router.get("/auth-url", response_model=AuthURLResponse)
-async def generate_auth_url(request: Request):
+async def generate_auth_url(request: Request, oauth_service: OAuthService = Depends(get_oauth_service)):
     """Generate OAuth authorization URL"""
     try:
         if not oauth_service.is_configured():
@@ -54,25 +52,25 @@ async def generate_auth_url(request: Request):
         
         # Store state in session (you might want to use Redis or database in production)
         # For now, we'll use a simple in-memory store
-        oauth_service.store_state(state)
+        await oauth_service.store_state(state)
         
         return AuthURLResponse(auth_url=auth_url, state=state)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate auth URL: {str(e)}")
 
 @router.post("/token", response_model=TokenResponse)
-async def exchange_token(token_request: TokenRequest):
+async def exchange_token(token_request: TokenRequest, oauth_service: OAuthService = Depends(get_oauth_service)):
     """Exchange authorization code for access token"""
     try:
         if not oauth_service.is_configured():
             raise HTTPException(status_code=400, detail="OAuth not configured")
         
         # Verify state
-        if not oauth_service.verify_state(token_request.state):
+        if not await oauth_service.verify_state(token_request.state):
             raise HTTPException(status_code=400, detail="Invalid state parameter")
         
         # Exchange code for tokens
-        tokens = oauth_service.exchange_code_for_tokens(token_request.code, token_request.state)
+        tokens = await oauth_service.exchange_code_for_tokens(token_request.code, token_request.state)
         
         if not tokens:
             raise HTTPException(status_code=400, detail="Failed to exchange code for tokens")
@@ -90,13 +88,13 @@ async def exchange_token(token_request: TokenRequest):
         raise HTTPException(status_code=500, detail=f"Token exchange failed: {str(e)}")
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(refresh_request: TokenRefreshRequest):
+async def refresh_token(refresh_request: TokenRefreshRequest, oauth_service: OAuthService = Depends(get_oauth_service)):
     """Refresh access token using refresh token"""
     try:
         if not oauth_service.is_configured():
             raise HTTPException(status_code=400, detail="OAuth not configured")
         
-        new_tokens = oauth_service.refresh_access_token(refresh_request.refresh_token)
+        new_tokens = await oauth_service.refresh_access_token(refresh_request.refresh_token)
         
         if not new_tokens:
             raise HTTPException(status_code=400, detail="Failed to refresh token")
@@ -114,10 +112,10 @@ async def refresh_token(refresh_request: TokenRefreshRequest):
         raise HTTPException(status_code=500, detail=f"Token refresh failed: {str(e)}")
 
 @router.post("/revoke", response_model=BaseResponse)
-async def revoke_token(token: str):
+async def revoke_token(token: str, oauth_service: OAuthService = Depends(get_oauth_service)):
     """Revoke access token"""
     try:
-        success = oauth_service.revoke_token(token)
+        success = await oauth_service.revoke_token(token)
         
         if success:
             return BaseResponse(success=True, message="Token revoked successfully")
@@ -129,7 +127,14 @@ async def revoke_token(token: str):
         raise HTTPException(status_code=500, detail=f"Token revocation failed: {str(e)}")
 
 @router.get("/callback")
-async def oauth_callback(request: Request, code: str = None, state: str = None, error: str = None):
+async def oauth_callback(
+    request: Request,
+    code: str = None,
+    state: str = None,
+    error: str = None,
+    oauth_service: OAuthService = Depends(get_oauth_service),
+    token_service: TokenService = Depends(get_token_service)
+):
     """Handle OAuth callback from Google"""
     try:
         if error:
@@ -146,20 +151,19 @@ async def oauth_callback(request: Request, code: str = None, state: str = None,
             )
         
         # Verify state
-        if not oauth_service.verify_state(state):
+        if not await oauth_service.verify_state(state):
             return RedirectResponse(
                 url=f"{oauth_service.get_frontend_url()}?error=invalid_state",
                 status_code=302
             )
         
         # Exchange code for tokens
-        tokens = oauth_service.exchange_code_for_tokens(code, state)
+        tokens = await oauth_service.exchange_code_for_tokens(code, state)
 
         if tokens:
             # Store tokens temporarily with a session ID
-            import secrets
-            session_id = secrets.token_urlsafe(32)
-            token_service.store_tokens(session_id, tokens)
+            session_id = pooled_token_urlsafe()
+            await token_service.store_tokens(session_id, tokens)
 
             # Redirect to frontend with session ID
             return RedirectResponse(
@@ -178,16 +182,14 @@ async def oauth_callback(request: Request, code: str = None, state: str = None,
         )
 
 @router.get("/tokens/{session_id}", response_model=TokenResponse)
-async def get_tokens_by_session(session_id: str):
+async def get_tokens_by_session(session_id: str, token_service: TokenService = Depends(get_token_service)):
     """Retrieve tokens by session ID"""
     try:
-        tokens = token_service.retrieve_tokens(session_id)
+        # Sessions are single-use: fetch and delete in one step
+        tokens = await token_service.take_tokens(session_id)
         if not tokens:
             raise HTTPException(status_code=404, detail="Session not found or expired")
 
-        # Clean up the session after retrieval
-        token_service.delete_tokens(session_id)
-
         return TokenResponse(
             access_token=tokens['access_token'],
             refresh_token=tokens.get('refresh_token'),
@@ -199,13 +201,13 @@ async def get_tokens_by_session(session_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to retrieve tokens: {str(e)}")
 
 @router.get("/user-info")
-async def get_user_info(access_token: str):
+async def get_user_info(access_token: str, oauth_service: OAuthService = Depends(get_oauth_service)):
     """Get user information from Google"""
     try:
-        user_info = oauth_service.get_user_info(access_token)
+        user_info = await oauth_service.get_user_info(access_token)
         
         if user_info:
-            return user_info
+            return ORJSONResponse(user_info)
         else:
             raise HTTPException(status_code=400, detail="Failed to get user info")
     except HTTPException:
@@ -214,7 +216,7 @@ async def get_user_info(access_token: str):
         raise HTTPException(status_code=500, detail=f"Failed to get user info: {str(e)}")
 
 @router.get("/status", response_model=BaseResponse)
-async def oauth_status():
+async def oauth_status(oauth_service: OAuthService = Depends(get_oauth_service)):
     """Get OAuth service status"""
     try:
         is_configured = oauth_service.is_configured()
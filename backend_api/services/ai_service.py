@@ -5,72 +5,369 @@ Supports: Google Gemini, OpenAI GPT, Anthropic Claude, and Demo Mode
 """
 
 import os
-import json
+import orjson
 import re
-from typing import Dict, Any, Optional, List
+import asyncio
+from typing import Dict, Any, AsyncIterator, Iterable, Optional, List, Tuple
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
+from collections import OrderedDict
+from functools import lru_cache
+
+from services.semantic_cache import SemanticCache
+from utils.http_client import get_http_client
+
+# Shared system prompt, kept byte-identical across calls so provider prefix caching can reuse it
+SYSTEM_PROMPT = (
+    "You are an AI assistant specialized in scheduling appointments using Google Calendar.\n"
+    "\n"
+    "When users want to schedule meetings, help them by:\n"
+    "1. Gathering required information (title, date, time, duration, attendees)\n"
+    "2. Providing clear, helpful responses\n"
+    "3. Being friendly and professional\n"
+    "\n"
+    "If you have all the information needed to create a meeting, indicate this clearly.\n"
+    "\n"
+    "Once you know at least the meeting title, date and start time, end your reply with a fenced "
+    "```json block containing \"title\", \"date\" (YYYY-MM-DD), \"start_time\" and \"end_time\" "
+    "(HH:MM, 24-hour), \"duration_minutes\", \"attendees\" (a list of emails) and \"description\", "
+    "using null for anything unknown."
+)
+
+# Upper bound on a single provider round-trip, in seconds
+PROVIDER_TIMEOUT_SECONDS = 20.0
+_GEMINI_REQUEST_OPTIONS = {"timeout": PROVIDER_TIMEOUT_SECONDS}
+
+# Gemini chat session pool bounds; a session is restarted once it outgrows the turn cap
+_GEMINI_MAX_SESSIONS = 10_000
+_GEMINI_SESSION_MAX_TURNS = 40
+
+# Anthropic system block marking the shared prompt as a cacheable prefix
+CLAUDE_SYSTEM = [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+
+
+def _keyword_classifier(table: Tuple[Tuple[str, Tuple[str, ...]], ...], default: str = 'GENERAL'):
+    """Build a single-scan classifier over (action, keywords) pairs listed in priority order"""
+    keyword_action = {word: action for action, words in table for word in words}
+    # Keywords are matched at word starts only, so inflections ("meetings", "booked") still hit;
+    # the lookahead keeps the scan to a single pass without consuming the word
+    pattern = re.compile(r'\b(?=(' + '|'.join(map(re.escape, sorted(keyword_action, key=len, reverse=True))) + '))')
+    priority = tuple(action for action, _ in table)
+
+    def classify(message_lower: str) -> str:
+        hits = {keyword_action[word] for word in pattern.findall(message_lower)}
+        for action in priority:
+            if action in hits:
+                return action
+        return default
+
+    return classify
+
+
+# Intent keywords in priority order; matched as word prefixes in the lowercased message
+_classify_action = _keyword_classifier((
+    ('CREATE_EVENT', ('schedule', 'meeting', 'book', 'create', 'appointment')),
+    ('CHECK_AVAILABILITY', ('availability', 'available', 'free', 'busy')),
+    ('VIEW_EVENTS', ('show', 'view', 'list', 'events', 'calendar')),
+))
+
+
+def determine_action(message: str, message_lower: Optional[str] = None) -> str:
+    """Determine action from message"""
+    return _classify_action(message_lower or message.lower())
+
+
+# Prompt budgets for prior turns, in approximate tokens (about four characters each)
+HISTORY_TOKEN_BUDGET = 3000
+EXTRACTION_TOKEN_BUDGET = 6000
+
+HistoryKey = Tuple[Tuple[str, str], ...]
+
+
+def _budget_tail(newest_first: Iterable[Tuple[str, str]], budget: int) -> HistoryKey:
+    """Keep the most recent turns whose combined size fits the token budget"""
+    turns = []
+    for role, content in newest_first:
+        budget -= len(content) // 4 + 1
+        if budget < 0:
+            break
+        turns.append((role, content))
+    turns.reverse()
+    return tuple(turns)
+
+
+def _history_key(chat_history: Optional[List[Dict]], budget: int = HISTORY_TOKEN_BUDGET) -> HistoryKey:
+    """Reduce the recent history that fits the token budget to a hashable key"""
+    if not chat_history:
+        return ()
+    return _budget_tail(
+        ((msg.get('role', 'user'), msg.get('content', '')) for msg in reversed(chat_history)), budget
+    )
+
+
+@lru_cache(maxsize=128)
+def _history_transcript(history: HistoryKey) -> str:
+    """Format history as a Gemini conversation transcript"""
+    return "Conversation:\n" + "".join(f"{role.title()}: {content}\n" for role, content in history)
+
+
+@lru_cache(maxsize=128)
+def _history_messages(history: HistoryKey) -> Tuple[Dict[str, str], ...]:
+    """Format history as chat-completion messages; shared, so callers must not mutate them"""
+    return tuple({"role": role, "content": content} for role, content in history)
+
+
+
+def _parse_meeting_datetime(date_str: str, time_str: str) -> datetime:
+    """Parse date and time strings with the C ISO parser, which also takes seconds and UTC offsets"""
+    try:
+        return datetime.fromisoformat(f"{date_str}T{time_str}")
+    except ValueError:
+        # Unpadded forms such as '9:30' are only accepted by strptime
+        return datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+
+
+# Fixed head of the extract_meeting_info prompt; the conversation transcript follows it
+_EXTRACTION_PROMPT_HEADER = (
+    "Extract meeting information from this conversation. Return ONLY a JSON object with these fields:\n"
+    "{\n"
+    '    "title": "meeting title/subject",\n'
+    '    "date": "YYYY-MM-DD format",\n'
+    '    "start_time": "HH:MM format (24-hour)",\n'
+    '    "end_time": "HH:MM format (24-hour)" or null,\n'
+    '    "duration_minutes": number or null,\n'
+    '    "attendees": ["email1", "email2"] or [],\n'
+    '    "description": "any additional details" or null\n'
+    "}\n"
+    "\n"
+    "If information is missing, use null. Only return the JSON object, no other text.\n"
+    "\n"
+    "Conversation:\n"
+)
+
+# Free-text meeting fields kept as stripped strings by validate_meeting_info
+_MEETING_TEXT_FIELDS = ('title', 'date', 'start_time', 'end_time', 'description')
+
+# Meeting details the model appends to its reply, per SYSTEM_PROMPT
+_MEETING_BLOCK_FENCE = "```json"
+_MEETING_BLOCK_RE = re.compile(r'```json\s*(\{.*?\})\s*```', re.S)
+
+
+def validate_meeting_info(meeting_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate and clean extracted meeting information"""
+    validated = {key: str(value).strip() for key in _MEETING_TEXT_FIELDS if (value := meeting_info.get(key))}
+
+    # Duration; JSON numbers arrive as int already, so only coerce other types
+    if duration := meeting_info.get('duration_minutes'):
+        if type(duration) is int:
+            validated['duration_minutes'] = duration
+        else:
+            try:
+                validated['duration_minutes'] = int(duration)
+            except (ValueError, TypeError):
+                pass
+
+    # Attendees
+    attendees = meeting_info.get('attendees')
+    if attendees and isinstance(attendees, list):
+        validated['attendees'] = [cleaned for email in attendees if email and (cleaned := str(email).strip())]
+
+    return validated
+
+
+def split_meeting_block(response_text: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Strip the fenced meeting JSON from a reply and return it validated"""
+    start = response_text.find(_MEETING_BLOCK_FENCE)
+    if start < 0:
+        return response_text, None
+    match = _MEETING_BLOCK_RE.search(response_text, start)
+    if not match:
+        # Unterminated block; never show the raw JSON to the user
+        return response_text[:start].rstrip(), None
+    try:
+        meeting_info = orjson.loads(match.group(1))
+    except orjson.JSONDecodeError:
+        meeting_info = None
+    cleaned = (response_text[:start] + response_text[match.end():]).strip()
+    if not isinstance(meeting_info, dict):
+        return cleaned, None
+    return cleaned, validate_meeting_info(meeting_info) or None
+
+
+def _fence_prefix_len(text: str) -> int:
+    """Length of the longest tail of text that could begin the meeting block fence"""
+    for size in range(min(len(_MEETING_BLOCK_FENCE) - 1, len(text)), 0, -1):
+        if text.endswith(_MEETING_BLOCK_FENCE[:size]):
+            return size
+    return 0
 
-# Load environment variables
-load_dotenv('../.env.local')
 
 class BaseAIProvider:
     """Base class for AI providers"""
 
+    __slots__ = ('api_key',)
+
     def __init__(self, api_key: str = None):
         self.api_key = api_key
 
-    async def chat(self, message: str, chat_history: List[Dict] = None) -> Dict[str, Any]:
+    async def chat(self, message: str, chat_history: List[Dict] = None,
+                   session_id: Optional[str] = None) -> Dict[str, Any]:
         """Process chat message - to be implemented by subclasses"""
         raise NotImplementedError
 
+    async def stream_chat(self, message: str, chat_history: List[Dict] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a reply as delta events followed by a final result event"""
+        result = await self.chat(message, chat_history)
+        yield {"delta": result.pop("response", "")}
+        yield {**result, "done": True}
+
+    async def _stream_reply(self, message: str, text_chunks: AsyncIterator[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Forward streamed text as delta events, then emit action and meeting info"""
+        parts = []
+        # Text not yet forwarded; held back while it could be the start of the meeting block
+        pending = ""
+        in_block = False
+        try:
+            async for text in text_chunks:
+                if not text:
+                    continue
+                parts.append(text)
+                if in_block:
+                    continue
+                pending += text
+                start = pending.find(_MEETING_BLOCK_FENCE)
+                if start >= 0:
+                    in_block = True
+                    pending = pending[:start]
+                    if pending:
+                        yield {"delta": pending}
+                    pending = ""
+                    continue
+                ready = len(pending) - _fence_prefix_len(pending)
+                if ready:
+                    yield {"delta": pending[:ready]}
+                    pending = pending[ready:]
+        except Exception as e:
+            yield {"delta": f"I encountered an error: {str(e)}"}
+            yield {"action": "GENERAL", "done": True}
+            return
+
+        if pending:
+            yield {"delta": pending}
+
+        final = self._build_result(message, "".join(parts))
+        del final["response"]
+        final["done"] = True
+        yield final
+
     def is_configured(self) -> bool:
         """Check if provider is properly configured"""
         return bool(self.api_key)
 
+# Demo intents use a narrower keyword set than the real providers
+_classify_demo_intent = _keyword_classifier((
+    ('CREATE_EVENT', ('schedule', 'meeting', 'book', 'create')),
+    ('CHECK_AVAILABILITY', ('availability', 'available', 'free')),
+))
+
+# Prebuilt demo replies per intent; nested values are shared, so treat as read-only
+_DEMO_RESPONSES = {
+    'CREATE_EVENT': {
+        "response": "I'd be happy to help you schedule a meeting! I can see you want to create an appointment. Please provide details like the date, time, duration, and attendees, and I'll help you set it up in your calendar.",
+        "action": "CREATE_EVENT",
+        "meeting_info": {
+            "title": "Demo Meeting",
+            "date": "2024-01-15",
+            "time": "14:00",
+            "duration": 60,
+            "attendees": []
+        }
+    },
+    'CHECK_AVAILABILITY': {
+        "response": "I can help you check your availability! Based on your calendar, you have several free slots this week. Would you like me to show you specific available times?",
+        "action": "CHECK_AVAILABILITY"
+    },
+    'GENERAL': {
+        "response": "Hello! I'm your AI calendar assistant. I can help you schedule meetings, check availability, and manage your calendar. What would you like to do today?",
+        "action": "GENERAL"
+    }
+}
+
 class DemoAIProvider(BaseAIProvider):
     """Demo AI provider with simulated responses"""
 
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
-    async def chat(self, message: str, chat_history: List[Dict] = None) -> Dict[str, Any]:
+    async def chat(self, message: str, chat_history: List[Dict] = None,
+                   session_id: Optional[str] = None) -> Dict[str, Any]:
         """Provide demo responses"""
-        message_lower = message.lower()
-
-        if any(word in message_lower for word in ['schedule', 'meeting', 'book', 'create']):
-            return {
-                "response": "I'd be happy to help you schedule a meeting! I can see you want to create an appointment. Please provide details like the date, time, duration, and attendees, and I'll help you set it up in your calendar.",
-                "action": "CREATE_EVENT",
-                "meeting_info": {
-                    "title": "Demo Meeting",
-                    "date": "2024-01-15",
-                    "time": "14:00",
-                    "duration": 60,
-                    "attendees": []
-                }
-            }
-        elif any(word in message_lower for word in ['availability', 'available', 'free']):
-            return {
-                "response": "I can help you check your availability! Based on your calendar, you have several free slots this week. Would you like me to show you specific available times?",
-                "action": "CHECK_AVAILABILITY"
-            }
-        else:
-            return {
-                "response": "Hello! I'm your AI calendar assistant. I can help you schedule meetings, check availability, and manage your calendar. What would you like to do today?",
-                "action": "GENERAL"
-            }
+        # Copied because callers add provider fields to the result
+        return dict(_DEMO_RESPONSES[_classify_demo_intent(message.lower())])
 
     def is_configured(self) -> bool:
         """Demo mode is always configured"""
         return True
 
-class GeminiProvider(BaseAIProvider):
+class ChatHelpersMixin:
+    """Intent and meeting-info helpers shared by the LLM providers"""
+
+    __slots__ = ()
+
+    _determine_action = staticmethod(determine_action)
+
+    def _extract_meeting_info(self, message: str, response: str,
+                              message_lower: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Extract meeting information from message and response"""
+        # Simple extraction - in a real implementation, this would be more sophisticated
+        info = {}
+        message_lower = message_lower or message.lower()
+
+        # Try to extract basic information
+        if 'meeting' in message_lower or 'appointment' in message_lower:
+            info['title'] = 'Meeting'
+            info['date'] = '2024-01-15'  # Default date
+            info['time'] = '14:00'       # Default time
+            info['duration'] = 60        # Default duration
+            info['attendees'] = []
+
+        return info if info else None
+
+    def _build_result(self, message: str, response_text: str) -> Dict[str, Any]:
+        """Turn a provider reply into a chat result, using the model's meeting block when present"""
+        response_text, meeting_info = split_meeting_block(response_text)
+        message_lower = message.lower()
+        action = 'CREATE_EVENT' if meeting_info else self._determine_action(message, message_lower)
+
+        result = {
+            "response": response_text,
+            "action": action
+        }
+
+        # Fall back to keyword extraction when the model sent no meeting block
+        if action == "CREATE_EVENT":
+            meeting_info = meeting_info or self._extract_meeting_info(message, response_text, message_lower)
+            if meeting_info:
+                result["meeting_info"] = meeting_info
+
+        return result
+
+class GeminiProvider(ChatHelpersMixin, BaseAIProvider):
     """Google Gemini AI provider"""
 
+    __slots__ = ('model', 'extraction_model', '_sessions')
+
+    # SDK module, imported on first construction only
+    _genai_mod = None
+
     def __init__(self, api_key: str):
         super().__init__(api_key)
         self.model = None
+        # Instruction-free model for extract_meeting_info; the chat persona would fight its JSON-only prompt
+        self.extraction_model = None
+        # Per-user chat sessions, LRU-ordered: session_id -> (ChatSession, expected history key)
+        self._sessions: OrderedDict = OrderedDict()
         self._initialize_model()
 
     def _initialize_model(self):
@@ -79,15 +376,22 @@ class GeminiProvider(BaseAIProvider):
             return
 
         try:
-            import google.generativeai as genai
+            if GeminiProvider._genai_mod is None:
+                import google.generativeai as genai
+                GeminiProvider._genai_mod = genai
+            genai = GeminiProvider._genai_mod
             genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
+            self.model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=SYSTEM_PROMPT)
+            self.extraction_model = genai.GenerativeModel('gemini-1.5-flash')
         except ImportError:
             self.model = None
+            self.extraction_model = None
         except Exception:
             self.model = None
+            self.extraction_model = None
     
-    async def chat(self, message: str, chat_history: List[Dict] = None) -> Dict[str, Any]:
+    async def chat(self, message: str, chat_history: List[Dict] = None,
+                   session_id: Optional[str] = None) -> Dict[str, Any]:
         """Process chat with Gemini"""
         if not self.model:
             return {
@@ -96,28 +400,15 @@ class GeminiProvider(BaseAIProvider):
             }
 
         try:
-            # Build conversation context
-            context = self._build_context(message, chat_history)
+            # Continue the user's chat session, or generate from a one-shot context
+            if session_id:
+                return await self._send_in_session(session_id, message, chat_history)
 
-            # Generate response
-            response = self.model.generate_content(context)
+            context = self._build_context(message, chat_history)
+            response = await self.model.generate_content_async(context, request_options=_GEMINI_REQUEST_OPTIONS)
 
             # Parse response and determine action
-            response_text = response.text
-            action = self._determine_action(message)
-
-            result = {
-                "response": response_text,
-                "action": action
-            }
-
-            # Extract meeting info if needed
-            if action == "CREATE_EVENT":
-                meeting_info = self._extract_meeting_info(message, response_text)
-                if meeting_info:
-                    result["meeting_info"] = meeting_info
-
-            return result
+            return self._build_result(message, response.text)
 
         except Exception as e:
             return {
@@ -125,62 +416,67 @@ class GeminiProvider(BaseAIProvider):
                 "action": "GENERAL"
             }
 
-    def _build_context(self, message: str, chat_history: List[Dict] = None) -> str:
-        """Build context for Gemini"""
-        system_prompt = """You are an AI assistant specialized in scheduling appointments using Google Calendar.
-
-        When users want to schedule meetings, help them by:
-        1. Gathering required information (title, date, time, duration, attendees)
-        2. Providing clear, helpful responses
-        3. Being friendly and professional
-
-        If you have all the information needed to create a meeting, indicate this clearly."""
-
-        context = system_prompt + "\n\nConversation:\n"
-
-        if chat_history:
-            for msg in chat_history[-10:]:
-                role = msg.get('role', 'user')
-                content = msg.get('content', '')
-                context += f"{role.title()}: {content}\n"
-
-        context += f"User: {message}\nAssistant:"
-        return context
-
-    def _determine_action(self, message: str) -> str:
-        """Determine action from message"""
-        message_lower = message.lower()
-        if any(word in message_lower for word in ['schedule', 'meeting', 'book', 'create', 'appointment']):
-            return 'CREATE_EVENT'
-        elif any(word in message_lower for word in ['availability', 'available', 'free', 'busy']):
-            return 'CHECK_AVAILABILITY'
-        elif any(word in message_lower for word in ['show', 'view', 'list', 'events', 'calendar']):
-            return 'VIEW_EVENTS'
+    async def _send_in_session(self, session_id: str, message: str, chat_history: List[Dict] = None) -> Dict[str, Any]:
+        """Send a message on the user's pooled chat session, restarting it if the history diverged"""
+        history = _history_key(chat_history)
+        # Taken out of the pool while in use so concurrent requests never share a session
+        entry = self._sessions.pop(session_id, None)
+        if entry is None or entry[1] != history or len(entry[0].history) > _GEMINI_SESSION_MAX_TURNS:
+            session = self.model.start_chat(history=[
+                {"role": "model" if role == "assistant" else "user", "parts": [content]}
+                for role, content in history
+            ])
         else:
-            return 'GENERAL'
+            session = entry[0]
+
+        response = await session.send_message_async(message, request_options=_GEMINI_REQUEST_OPTIONS)
+        result = self._build_result(message, response.text)
+
+        # Key on the cleaned reply, since that is what the client echoes back as history
+        expected = _budget_tail(
+            reversed(history + (("user", message), ("assistant", result["response"]))), HISTORY_TOKEN_BUDGET
+        )
+        self._sessions[session_id] = (session, expected)
+        if len(self._sessions) > _GEMINI_MAX_SESSIONS:
+            self._sessions.popitem(last=False)
+        return result
+
+    async def stream_chat(self, message: str, chat_history: List[Dict] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream chat with Gemini"""
+        if not self.model:
+            async for event in super().stream_chat(message, chat_history):
+                yield event
+            return
 
-    def _extract_meeting_info(self, message: str, response: str) -> Optional[Dict[str, Any]]:
-        """Extract meeting information from message and response"""
-        # Simple extraction - in a real implementation, this would be more sophisticated
-        info = {}
+        async for event in self._stream_reply(message, self._stream_text(message, chat_history)):
+            yield event
 
-        # Try to extract basic information
-        if 'meeting' in message.lower() or 'appointment' in message.lower():
-            info['title'] = 'Meeting'
-            info['date'] = '2024-01-15'  # Default date
-            info['time'] = '14:00'       # Default time
-            info['duration'] = 60        # Default duration
-            info['attendees'] = []
+    async def _stream_text(self, message: str, chat_history: List[Dict] = None) -> AsyncIterator[str]:
+        """Yield Gemini response text as it is generated"""
+        context = self._build_context(message, chat_history)
+        response = await self.model.generate_content_async(
+            context, stream=True, request_options=_GEMINI_REQUEST_OPTIONS
+        )
+        async for chunk in response:
+            yield chunk.text
+
+    def _build_context(self, message: str, chat_history: List[Dict] = None) -> str:
+        """Build context for Gemini"""
+        return _history_transcript(_history_key(chat_history)) + f"User: {message}\nAssistant:"
 
-        return info if info else None
 
     def is_configured(self) -> bool:
         """Check if Gemini is properly configured"""
         return bool(self.api_key and self.model)
 
-class OpenAIProvider(BaseAIProvider):
+class OpenAIProvider(ChatHelpersMixin, BaseAIProvider):
     """OpenAI GPT provider"""
 
+    __slots__ = ('model_name', 'client')
+
+    # SDK module, imported on first construction only
+    _openai_mod = None
+
     def __init__(self, api_key: str, model: str = "gpt-3.5-turbo"):
         super().__init__(api_key)
         self.model_name = model
@@ -193,14 +489,19 @@ class OpenAIProvider(BaseAIProvider):
             return
 
         try:
-            import openai
-            self.client = openai.OpenAI(api_key=self.api_key)
+            if OpenAIProvider._openai_mod is None:
+                import openai
+                OpenAIProvider._openai_mod = openai
+            self.client = OpenAIProvider._openai_mod.AsyncOpenAI(
+                api_key=self.api_key, http_client=get_http_client(), timeout=PROVIDER_TIMEOUT_SECONDS
+            )
         except ImportError:
             self.client = None
         except Exception:
             self.client = None
 
-    async def chat(self, message: str, chat_history: List[Dict] = None) -> Dict[str, Any]:
+    async def chat(self, message: str, chat_history: List[Dict] = None,
+                   session_id: Optional[str] = None) -> Dict[str, Any]:
         """Process chat with OpenAI"""
         if not self.client:
             return {
@@ -213,28 +514,15 @@ class OpenAIProvider(BaseAIProvider):
             messages = self._build_openai_messages(message, chat_history)
 
             # Generate response
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model_name,
                 messages=messages,
                 max_tokens=500,
-                temperature=0.7
+                temperature=0.7,
+                **({"user": session_id} if session_id else {})
             )
 
-            response_text = response.choices[0].message.content
-            action = self._determine_action(message)
-
-            result = {
-                "response": response_text,
-                "action": action
-            }
-
-            # Extract meeting info if needed
-            if action == "CREATE_EVENT":
-                meeting_info = self._extract_meeting_info(message, response_text)
-                if meeting_info:
-                    result["meeting_info"] = meeting_info
-
-            return result
+            return self._build_result(message, response.choices[0].message.content)
 
         except Exception as e:
             return {
@@ -242,59 +530,48 @@ class OpenAIProvider(BaseAIProvider):
                 "action": "GENERAL"
             }
 
+    async def stream_chat(self, message: str, chat_history: List[Dict] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream chat with OpenAI"""
+        if not self.client:
+            async for event in super().stream_chat(message, chat_history):
+                yield event
+            return
+
+        async for event in self._stream_reply(message, self._stream_text(message, chat_history)):
+            yield event
+
+    async def _stream_text(self, message: str, chat_history: List[Dict] = None) -> AsyncIterator[str]:
+        """Yield OpenAI response text as it is generated"""
+        stream = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=self._build_openai_messages(message, chat_history),
+            max_tokens=500,
+            temperature=0.7,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
     def is_configured(self) -> bool:
         """Check if OpenAI is properly configured"""
         return bool(self.api_key and self.client)
 
     def _build_openai_messages(self, message: str, chat_history: List[Dict] = None) -> List[Dict]:
         """Build messages for OpenAI format"""
-        messages = [
-            {
-                "role": "system",
-                "content": "You are an AI assistant specialized in scheduling appointments using Google Calendar. Help users schedule meetings by gathering required information and providing clear, helpful responses."
-            }
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            *_history_messages(_history_key(chat_history)),
+            {"role": "user", "content": message}
         ]
 
-        if chat_history:
-            for msg in chat_history[-10:]:
-                role = msg.get('role', 'user')
-                if role == 'assistant':
-                    role = 'assistant'
-                content = msg.get('content', '')
-                messages.append({"role": role, "content": content})
-
-        messages.append({"role": "user", "content": message})
-        return messages
-
-    def _determine_action(self, message: str) -> str:
-        """Determine action from message"""
-        message_lower = message.lower()
-        if any(word in message_lower for word in ['schedule', 'meeting', 'book', 'create', 'appointment']):
-            return 'CREATE_EVENT'
-        elif any(word in message_lower for word in ['availability', 'available', 'free', 'busy']):
-            return 'CHECK_AVAILABILITY'
-        elif any(word in message_lower for word in ['show', 'view', 'list', 'events', 'calendar']):
-            return 'VIEW_EVENTS'
-        else:
-            return 'GENERAL'
-
-    def _extract_meeting_info(self, message: str, response: str) -> Optional[Dict[str, Any]]:
-        """Extract meeting information from message and response"""
-        # Simple extraction - in a real implementation, this would be more sophisticated
-        info = {}
+class ClaudeProvider(ChatHelpersMixin, BaseAIProvider):
+    """Anthropic Claude provider"""
 
-        # Try to extract basic information
-        if 'meeting' in message.lower() or 'appointment' in message.lower():
-            info['title'] = 'Meeting'
-            info['date'] = '2024-01-15'  # Default date
-            info['time'] = '14:00'       # Default time
-            info['duration'] = 60        # Default duration
-            info['attendees'] = []
+    __slots__ = ('model_name', 'client')
 
-        return info if info else None
-    
-class ClaudeProvider(BaseAIProvider):
-    """Anthropic Claude provider"""
+    # SDK module, imported on first construction only
+    _anthropic_mod = None
 
     def __init__(self, api_key: str, model: str = "claude-3-haiku-20240307"):
         super().__init__(api_key)
@@ -308,14 +585,24 @@ class ClaudeProvider(BaseAIProvider):
             return
 
         try:
-            import anthropic
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+            if ClaudeProvider._anthropic_mod is None:
+                import anthropic
+                ClaudeProvider._anthropic_mod = anthropic
+            anthropic = ClaudeProvider._anthropic_mod
+            try:
+                self.client = anthropic.AsyncAnthropic(
+                    api_key=self.api_key, http_client=get_http_client(), timeout=PROVIDER_TIMEOUT_SECONDS
+                )
+            except TypeError:
+                # SDK releases built on a different HTTP stack reject httpx clients
+                self.client = anthropic.AsyncAnthropic(api_key=self.api_key, timeout=PROVIDER_TIMEOUT_SECONDS)
         except ImportError:
             self.client = None
         except Exception:
             self.client = None
 
-    async def chat(self, message: str, chat_history: List[Dict] = None) -> Dict[str, Any]:
+    async def chat(self, message: str, chat_history: List[Dict] = None,
+                   session_id: Optional[str] = None) -> Dict[str, Any]:
         """Process chat with Claude"""
         if not self.client:
             return {
@@ -328,27 +615,15 @@ class ClaudeProvider(BaseAIProvider):
             messages = self._build_claude_messages(message, chat_history)
 
             # Generate response
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model_name,
                 max_tokens=500,
-                messages=messages
+                system=CLAUDE_SYSTEM,
+                messages=messages,
+                **({"metadata": {"user_id": session_id}} if session_id else {})
             )
 
-            response_text = response.content[0].text
-            action = self._determine_action(message)
-
-            result = {
-                "response": response_text,
-                "action": action
-            }
-
-            # Extract meeting info if needed
-            if action == "CREATE_EVENT":
-                meeting_info = self._extract_meeting_info(message, response_text)
-                if meeting_info:
-                    result["meeting_info"] = meeting_info
-
-            return result
+            return self._build_result(message, response.content[0].text)
 
         except Exception as e:
             return {
@@ -356,56 +631,50 @@ class ClaudeProvider(BaseAIProvider):
                 "action": "GENERAL"
             }
 
+    async def stream_chat(self, message: str, chat_history: List[Dict] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream chat with Claude"""
+        if not self.client:
+            async for event in super().stream_chat(message, chat_history):
+                yield event
+            return
+
+        async for event in self._stream_reply(message, self._stream_text(message, chat_history)):
+            yield event
+
+    async def _stream_text(self, message: str, chat_history: List[Dict] = None) -> AsyncIterator[str]:
+        """Yield Claude response text as it is generated"""
+        async with self.client.messages.stream(
+            model=self.model_name,
+            max_tokens=500,
+            system=CLAUDE_SYSTEM,
+            messages=self._build_claude_messages(message, chat_history)
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
     def is_configured(self) -> bool:
         """Check if Claude is properly configured"""
         return bool(self.api_key and self.client)
 
     def _build_claude_messages(self, message: str, chat_history: List[Dict] = None) -> List[Dict]:
         """Build messages for Claude format"""
-        messages = []
-
-        if chat_history:
-            for msg in chat_history[-10:]:
-                role = msg.get('role', 'user')
-                if role == 'assistant':
-                    role = 'assistant'
-                content = msg.get('content', '')
-                messages.append({"role": role, "content": content})
-
-        messages.append({"role": "user", "content": message})
-        return messages
-
-    def _determine_action(self, message: str) -> str:
-        """Determine action from message"""
-        message_lower = message.lower()
-        if any(word in message_lower for word in ['schedule', 'meeting', 'book', 'create', 'appointment']):
-            return 'CREATE_EVENT'
-        elif any(word in message_lower for word in ['availability', 'available', 'free', 'busy']):
-            return 'CHECK_AVAILABILITY'
-        elif any(word in message_lower for word in ['show', 'view', 'list', 'events', 'calendar']):
-            return 'VIEW_EVENTS'
-        else:
-            return 'GENERAL'
-
-    def _extract_meeting_info(self, message: str, response: str) -> Optional[Dict[str, Any]]:
-        """Extract meeting information from message and response"""
-        # Simple extraction - in a real implementation, this would be more sophisticated
-        info = {}
-
-        # Try to extract basic information
-        if 'meeting' in message.lower() or 'appointment' in message.lower():
-            info['title'] = 'Meeting'
-            info['date'] = '2024-01-15'  # Default date
-            info['time'] = '14:00'       # Default time
-            info['duration'] = 60        # Default duration
-            info['attendees'] = []
+        return [*_history_messages(_history_key(chat_history)), {"role": "user", "content": message}]
 
-        return info if info else None
+# Display info per provider key; shared across responses, so treat as read-only
+_PROVIDER_INFO = {
+    'demo': {'name': 'Demo Mode', 'icon': '🎯', 'key': 'demo'},
+    'gemini': {'name': 'Google Gemini', 'icon': '🧠', 'key': 'gemini'},
+    'openai': {'name': 'OpenAI GPT', 'icon': '🤖', 'key': 'openai'},
+    'claude': {'name': 'Anthropic Claude', 'icon': '🎭', 'key': 'claude'}
+}
+_UNKNOWN_PROVIDER_INFO = {'name': 'Unknown', 'icon': '❓', 'key': 'unknown'}
 
 class AIService:
     """Multi-provider AI service for conversation and meeting scheduling"""
 
-    def __init__(self):
+    __slots__ = ('providers', 'current_provider', 'semantic_cache', '_semaphore')
+
+    def __init__(self, max_concurrency: int = 32):
         """Initialize AI service with multi-provider support"""
         self.providers = {
             'demo': DemoAIProvider(),
@@ -414,6 +683,9 @@ class AIService:
             'claude': None
         }
         self.current_provider = 'demo'
+        self.semantic_cache = SemanticCache()
+        # Caps in-flight provider calls from batch requests to respect rate limits
+        self._semaphore = asyncio.Semaphore(max_concurrency)
         self._initialize_default_provider()
 
     def _initialize_default_provider(self):
@@ -465,16 +737,11 @@ class AIService:
 
     def get_current_provider_info(self) -> Dict[str, Any]:
         """Get information about current provider"""
-        provider_info = {
-            'demo': {'name': 'Demo Mode', 'icon': '🎯', 'key': 'demo'},
-            'gemini': {'name': 'Google Gemini', 'icon': '🧠', 'key': 'gemini'},
-            'openai': {'name': 'OpenAI GPT', 'icon': '🤖', 'key': 'openai'},
-            'claude': {'name': 'Anthropic Claude', 'icon': '🎭', 'key': 'claude'}
-        }
-        return provider_info.get(self.current_provider, {'name': 'Unknown', 'icon': '❓', 'key': 'unknown'})
+        return _PROVIDER_INFO.get(self.current_provider, _UNKNOWN_PROVIDER_INFO)
 
     async def get_response(self, user_message: str, chat_history: List[Dict],
-                          calendar_connected: bool = False) -> Dict[str, Any]:
+                          calendar_connected: bool = False,
+                          session_id: Optional[str] = None) -> Dict[str, Any]:
         """Get AI response using current provider"""
         provider = self.get_current_provider()
         if not provider:
@@ -484,7 +751,20 @@ class AIService:
             }
         
         try:
-            result = await provider.chat(user_message, chat_history)
+            # Reuse a cached reply for a near-duplicate message in the same conversation;
+            # first messages without a session have no scope and skip the cache
+            scope = SemanticCache.scope_for(self.current_provider, chat_history, session_id)
+            vector = await self.semantic_cache.embed(user_message) if scope is not None else None
+            result = self.semantic_cache.lookup(vector, scope)
+            if result is not None:
+                result['cache'] = 'hit'
+            else:
+                result = await asyncio.wait_for(
+                    provider.chat(user_message, chat_history, session_id), timeout=PROVIDER_TIMEOUT_SECONDS
+                )
+                # Meeting creation replies are stateful, so never replay them
+                if result.get('action') != 'CREATE_EVENT':
+                    self.semantic_cache.add(vector, scope, result)
 
             # Add provider info to result
             result['provider'] = self.get_current_provider_info()
@@ -492,6 +772,12 @@ class AIService:
 
             return result
 
+        except asyncio.TimeoutError:
+            return {
+                "response": "Timed out contacting AI provider.",
+                "action": "GENERAL",
+                "provider": self.get_current_provider_info()
+            }
         except Exception as e:
             return {
                 "response": f"I encountered an error: {str(e)}",
@@ -499,6 +785,31 @@ class AIService:
                 "provider": self.get_current_provider_info()
             }
 
+    async def get_responses(self, items: List[Tuple[str, List[Dict]]],
+                            calendar_connected: bool = False) -> List[Dict[str, Any]]:
+        """Get AI responses for several messages concurrently"""
+        async def bounded(user_message: str, chat_history: List[Dict]) -> Dict[str, Any]:
+            async with self._semaphore:
+                return await self.get_response(user_message, chat_history, calendar_connected)
+
+        return await asyncio.gather(*(bounded(message, history) for message, history in items))
+
+    async def stream_response(self, user_message: str, chat_history: List[Dict],
+                              calendar_connected: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Stream an AI response from the current provider"""
+        provider = self.get_current_provider()
+        provider_info = self.get_current_provider_info()
+        if not provider:
+            yield {"delta": "I apologize, but no AI provider is available."}
+            yield {"action": "GENERAL", "provider": provider_info, "done": True}
+            return
+
+        async for event in provider.stream_chat(user_message, chat_history):
+            if event.get("done"):
+                event["provider"] = provider_info
+                event["calendar_connected"] = calendar_connected
+            yield event
+
     def is_configured(self) -> bool:
         """Check if current provider is configured"""
         provider = self.get_current_provider()
@@ -519,49 +830,20 @@ class AIService:
         else:
             return "unknown"
     
-    def _extract_action(self, response_text: str) -> Optional[str]:
-        """Extract action indicator from response"""
-        if "[ACTION:CREATE_EVENT]" in response_text:
-            return "CREATE_EVENT"
-        elif "[ACTION:NEED_INFO]" in response_text:
-            return "NEED_INFO"
-        return None
-    
-    def _clean_response_text(self, response_text: str) -> str:
-        """Remove action indicators from response text"""
-        # Remove action indicators
-        clean_text = re.sub(r'\[ACTION:[^\]]+\]', '', response_text)
-        return clean_text.strip()
-    
     async def extract_meeting_info(self, chat_history: List[Dict]) -> Optional[Dict[str, Any]]:
         """Extract meeting information from conversation history"""
-        if not self.model:
+        # Use the provider and key the user picked; only Gemini has an extraction model
+        model = getattr(self.get_current_provider(), 'extraction_model', None)
+        if not model:
             return None
         
         try:
-            # Create extraction prompt
-            extraction_prompt = """Extract meeting information from this conversation. Return ONLY a JSON object with these fields:
-            {
-                "title": "meeting title/subject",
-                "date": "YYYY-MM-DD format",
-                "start_time": "HH:MM format (24-hour)",
-                "end_time": "HH:MM format (24-hour)" or null,
-                "duration_minutes": number or null,
-                "attendees": ["email1", "email2"] or [],
-                "description": "any additional details" or null
-            }
-
-            If information is missing, use null. Only return the JSON object, no other text.
-
-            Conversation:
-            """
-            
-            for msg in chat_history[-20:]:  # Last 20 messages
-                role = msg.get('role', 'user')
-                content = msg.get('content', '')
-                extraction_prompt += f"{role.title()}: {content}\n"
+            # Most recent turns within the extraction budget, joined once onto the fixed header
+            extraction_prompt = _EXTRACTION_PROMPT_HEADER + "".join(
+                f"{role.title()}: {content}\n" for role, content in _history_key(chat_history, EXTRACTION_TOKEN_BUDGET)
+            )
             
-            response = self.model.generate_content(extraction_prompt)
+            response = await model.generate_content_async(extraction_prompt, request_options=_GEMINI_REQUEST_OPTIONS)
             
             if response.text:
                 # Try to parse JSON from response
@@ -575,12 +857,12 @@ class AIService:
                     
                     if start_idx >= 0 and end_idx > start_idx:
                         json_text = json_text[start_idx:end_idx]
-                        meeting_info = json.loads(json_text)
+                        meeting_info = orjson.loads(json_text)
                         
                         # Validate and clean the extracted info
                         return self._validate_meeting_info(meeting_info)
                     
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     pass
             
             return None
@@ -588,44 +870,7 @@ class AIService:
         except Exception:
             return None
     
-    def _validate_meeting_info(self, meeting_info: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate and clean extracted meeting information"""
-        validated = {}
-        
-        # Title
-        if meeting_info.get('title'):
-            validated['title'] = str(meeting_info['title']).strip()
-        
-        # Date
-        if meeting_info.get('date'):
-            validated['date'] = str(meeting_info['date']).strip()
-        
-        # Start time
-        if meeting_info.get('start_time'):
-            validated['start_time'] = str(meeting_info['start_time']).strip()
-        
-        # End time
-        if meeting_info.get('end_time'):
-            validated['end_time'] = str(meeting_info['end_time']).strip()
-        
-        # Duration
-        if meeting_info.get('duration_minutes'):
-            try:
-                validated['duration_minutes'] = int(meeting_info['duration_minutes'])
-            except (ValueError, TypeError):
-                pass
-        
-        # Attendees
-        if meeting_info.get('attendees'):
-            attendees = meeting_info['attendees']
-            if isinstance(attendees, list):
-                validated['attendees'] = [str(email).strip() for email in attendees if email]
-        
-        # Description
-        if meeting_info.get('description'):
-            validated['description'] = str(meeting_info['description']).strip()
-        
-        return validated
+    _validate_meeting_info = staticmethod(validate_meeting_info)
     
     async def create_calendar_event(self, meeting_info: Dict[str, Any], 
                                    calendar_service) -> Dict[str, Any]:
@@ -646,14 +891,11 @@ class AIService:
             start_time_str = meeting_info['start_time']
             
             # Combine date and time
-            datetime_str = f"{date_str} {start_time_str}"
-            start_datetime = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M")
+            start_datetime = _parse_meeting_datetime(date_str, start_time_str)
             
             # Calculate end time
             if meeting_info.get('end_time'):
-                end_time_str = meeting_info['end_time']
-                end_datetime_str = f"{date_str} {end_time_str}"
-                end_datetime = datetime.strptime(end_datetime_str, "%Y-%m-%d %H:%M")
+                end_datetime = _parse_meeting_datetime(date_str, meeting_info['end_time'])
             elif meeting_info.get('duration_minutes'):
                 duration = int(meeting_info['duration_minutes'])
                 end_datetime = start_datetime + timedelta(minutes=duration)
@@ -676,88 +918,3 @@ class AIService:
             return {"success": False, "error": f"Invalid date/time format: {str(e)}"}
         except Exception as e:
             return {"success": False, "error": f"Error creating event: {str(e)}"}
-
-    # Helper methods for different providers
-    def _build_context(self, message: str, chat_history: List[Dict] = None) -> str:
-        """Build context for Gemini"""
-        system_prompt = """You are an AI assistant specialized in scheduling appointments using Google Calendar.
-
-        When users want to schedule meetings, help them by:
-        1. Gathering required information (title, date, time, duration, attendees)
-        2. Providing clear, helpful responses
-        3. Being friendly and professional
-
-        If you have all the information needed to create a meeting, indicate this clearly."""
-
-        context = system_prompt + "\n\nConversation:\n"
-
-        if chat_history:
-            for msg in chat_history[-10:]:
-                role = msg.get('role', 'user')
-                content = msg.get('content', '')
-                context += f"{role.title()}: {content}\n"
-
-        context += f"User: {message}\nAssistant:"
-        return context
-
-    def _build_openai_messages(self, message: str, chat_history: List[Dict] = None) -> List[Dict]:
-        """Build messages for OpenAI format"""
-        messages = [
-            {
-                "role": "system",
-                "content": "You are an AI assistant specialized in scheduling appointments using Google Calendar. Help users schedule meetings by gathering required information and providing clear, helpful responses."
-            }
-        ]
-
-        if chat_history:
-            for msg in chat_history[-10:]:
-                role = msg.get('role', 'user')
-                if role == 'assistant':
-                    role = 'assistant'
-                content = msg.get('content', '')
-                messages.append({"role": role, "content": content})
-
-        messages.append({"role": "user", "content": message})
-        return messages
-
-    def _build_claude_messages(self, message: str, chat_history: List[Dict] = None) -> List[Dict]:
-        """Build messages for Claude format"""
-        messages = []
-
-        if chat_history:
-            for msg in chat_history[-10:]:
-                role = msg.get('role', 'user')
-                if role == 'assistant':
-                    role = 'assistant'
-                content = msg.get('content', '')
-                messages.append({"role": role, "content": content})
-
-        messages.append({"role": "user", "content": message})
-        return messages
-
-    def _determine_action(self, message: str) -> str:
-        """Determine action from message"""
-        message_lower = message.lower()
-        if any(word in message_lower for word in ['schedule', 'meeting', 'book', 'create', 'appointment']):
-            return 'CREATE_EVENT'
-        elif any(word in message_lower for word in ['availability', 'available', 'free', 'busy']):
-            return 'CHECK_AVAILABILITY'
-        elif any(word in message_lower for word in ['show', 'view', 'list', 'events', 'calendar']):
-            return 'VIEW_EVENTS'
-        else:
-            return 'GENERAL'
-
-    def _extract_meeting_info(self, message: str, response: str) -> Optional[Dict[str, Any]]:
-        """Extract meeting information from message and response"""
-        # Simple extraction - in a real implementation, this would be more sophisticated
-        info = {}
-
-        # Try to extract basic information
-        if 'meeting' in message.lower() or 'appointment' in message.lower():
-            info['title'] = 'Meeting'
-            info['date'] = '2024-01-15'  # Default date
-            info['time'] = '14:00'       # Default time
-            info['duration'] = 60        # Default duration
-            info['attendees'] = []
-
-        return info if info else None
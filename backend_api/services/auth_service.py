@@ -4,32 +4,66 @@ Handles token validation and user authentication
 """
 
 import os
-from typing import Dict, Any, Optional
+import asyncio
+import hashlib
+import orjson
+from typing import Dict, Any, Optional, Tuple
+from cachetools import TLRUCache, TTLCache
 from fastapi import HTTPException, Depends, Header
-import requests
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv('.env.local')
+from utils.http_client import get_http_client
+
+# Validated tokens are re-checked with Google after at most this many seconds
+TOKEN_CACHE_TTL_SECONDS = 300
+_TOKEN_CACHE_SIZE = 10_000
+
+def _token_cache_key(access_token: str) -> bytes:
+    """Hash an access token so raw tokens are never held as cache keys"""
+    return hashlib.blake2b(access_token.encode(), digest_size=16).digest()
+
+def _token_info_ttu(key: bytes, value: Tuple[int, Dict[str, Any]], now: float) -> float:
+    """Expire a cached tokeninfo entry after its own effective TTL"""
+    return now + value[0]
 
 class AuthService:
     """Authentication service for API requests"""
     
     def __init__(self):
         """Initialize auth service"""
-        pass
+        # token hash -> (effective ttl, tokeninfo); bounded by the token's own expires_in
+        self._token_info_cache = TLRUCache(maxsize=_TOKEN_CACHE_SIZE, ttu=_token_info_ttu)
+        self._user_info_cache = TTLCache(maxsize=_TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+        # token hash -> in-flight tokeninfo lookup shared by concurrent callers
+        self._inflight: Dict[bytes, asyncio.Task] = {}
     
     async def validate_access_token(self, access_token: str) -> Optional[Dict[str, Any]]:
         """Validate Google access token and get user info"""
+        key = _token_cache_key(access_token)
+        cached = self._token_info_cache.get(key)
+        if cached is not None:
+            return cached[1]
+
+        # Coalesce concurrent validations of the same token into one Google call
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_token_info(access_token, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one cancelled caller doesn't cancel the lookup for the others
+        return await asyncio.shield(task)
+    
+    async def _fetch_token_info(self, access_token: str, key: bytes) -> Optional[Dict[str, Any]]:
+        """Validate a token with Google and cache it when it carries the required scopes"""
         try:
             # Validate token with Google
-            response = requests.get(
-                f'https://www.googleapis.com/oauth2/v1/tokeninfo?access_token={access_token}',
+            response = await get_http_client().get(
+                'https://www.googleapis.com/oauth2/v1/tokeninfo',
+                params={'access_token': access_token},
                 timeout=30
             )
             
             if response.status_code == 200:
-                token_info = response.json()
+                token_info = orjson.loads(response.content)
                 
                 # Check if token is valid and has required scopes
                 required_scopes = [
@@ -43,6 +77,12 @@ class AuthService:
                 has_required_scopes = all(scope in token_scopes for scope in required_scopes)
                 
                 if has_required_scopes:
+                    try:
+                        ttl = min(TOKEN_CACHE_TTL_SECONDS, int(token_info.get('expires_in', 0)))
+                    except (TypeError, ValueError):
+                        ttl = 0
+                    if ttl > 0:
+                        self._token_info_cache[key] = (ttl, token_info)
                     return token_info
             
             return None
@@ -51,15 +91,22 @@ class AuthService:
     
     async def get_user_info_from_token(self, access_token: str) -> Optional[Dict[str, Any]]:
         """Get user information from access token"""
+        key = _token_cache_key(access_token)
+        cached = self._user_info_cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
-            response = requests.get(
+            response = await get_http_client().get(
                 'https://www.googleapis.com/oauth2/v2/userinfo',
                 headers={'Authorization': f'Bearer {access_token}'},
                 timeout=30
             )
             
             if response.status_code == 200:
-                return response.json()
+                user_info = orjson.loads(response.content)
+                self._user_info_cache[key] = user_info
+                return user_info
             
             return None
         except Exception:
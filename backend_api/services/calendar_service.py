@@ -4,25 +4,60 @@ Migrated from backend/google_calendar_service.py to work with FastAPI
 """
 
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 import pytz
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv('.env.local')
+# Worker pool for blocking googleapiclient/httplib2 calls, sized by GOOGLE_API_MAX_WORKERS
+_google_api_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('GOOGLE_API_MAX_WORKERS', '32')),
+    thread_name_prefix='google-api'
+)
+
+# Google caps a batch request at 50 calls
+_MAX_BATCH_SIZE = 50
+
+# Calendars use a handful of zone names, so memoize the lookups
+_get_tz = lru_cache(maxsize=128)(pytz.timezone)
+
+async def _run_blocking(func, *args):
+    """Run a blocking Google client call on the worker pool"""
+    return await asyncio.get_running_loop().run_in_executor(_google_api_executor, func, *args)
+
+class CalendarAuthError(Exception):
+    """Google rejected the service's access token"""
 
 class CalendarService:
     """Google Calendar service for FastAPI backend"""
     
+    # Google auth and discovery clients, imported on first use to keep them off the startup path
+    _credentials_cls = None
+    _auth_request_cls = None
+    _build = None
+    
+    @classmethod
+    def _load_google_client(cls):
+        """Import the Google client modules once per process"""
+        if cls._build is None:
+            from google.oauth2.credentials import Credentials
+            from google.auth.transport.requests import Request
+            from googleapiclient.discovery import build
+            cls._credentials_cls = Credentials
+            cls._auth_request_cls = Request
+            cls._build = staticmethod(build)
+    
     def __init__(self):
         """Initialize calendar service"""
         self.service = None
         self.credentials = None
+        # Primary calendar timezone, fetched once per initialized service
+        self._primary_timezone: Optional[str] = None
+        # httplib2 is not thread-safe, so calls on this service's connection run one at a time
+        self._lock = asyncio.Lock()
         
     def _get_client_id(self) -> str:
         """Get Google OAuth Client ID"""
@@ -32,11 +67,14 @@ class CalendarService:
         """Get Google OAuth Client Secret"""
         return os.getenv('GOOGLE_CLIENT_SECRET', '')
     
-    async def initialize_with_token(self, access_token: str, refresh_token: str = None) -> bool:
-        """Initialize service with OAuth token"""
+    async def initialize_with_token(self, access_token: str, refresh_token: str = None,
+                                    verify: bool = False) -> bool:
+        """Initialize service with OAuth token; verify probes the API before returning"""
         try:
+            self._load_google_client()
+            
             # Create credentials from token
-            self.credentials = Credentials(
+            self.credentials = self._credentials_cls(
                 token=access_token,
                 refresh_token=refresh_token,
                 token_uri='https://oauth2.googleapis.com/token',
@@ -53,16 +91,24 @@ class CalendarService:
             # Check if token is expired and refresh if needed
             if self.credentials.expired and self.credentials.refresh_token:
                 try:
-                    self.credentials.refresh(Request())
+                    await _run_blocking(self.credentials.refresh, self._auth_request_cls())
                 except Exception:
                     return False
             
-            # Build the service
-            self.service = build('calendar', 'v3', credentials=self.credentials)
+            # Build the service from the discovery document bundled with googleapiclient, never over the network
+            self.service = await _run_blocking(partial(
+                self._build, 'calendar', 'v3', credentials=self.credentials,
+                cache_discovery=False, static_discovery=True
+            ))
+            
+            # Without verify, the first real call surfaces auth errors instead of an extra round-trip
+            if not verify:
+                return True
             
-            # Test the connection
+            # Test the connection; fetching the primary calendar also yields its timezone
             try:
-                calendar_list = self.service.calendarList().list(maxResults=1).execute()
+                calendar_info = await self._execute(self.service.calendars().get(calendarId='primary'))
+                self._primary_timezone = calendar_info.get('timeZone', 'UTC')
                 return True
             except Exception:
                 return False
@@ -70,6 +116,102 @@ class CalendarService:
         except Exception:
             return False
     
+    async def _execute(self, request) -> Any:
+        """Execute a googleapiclient request without blocking the event loop"""
+        async with self._lock:
+            try:
+                return await _run_blocking(request.execute)
+            except HttpError as error:
+                if error.resp.status == 401:
+                    raise CalendarAuthError(self._http_error_details(error)) from error
+                raise
+    
+    async def _get_primary_timezone(self) -> str:
+        """Get the primary calendar timezone, looking it up only on first use"""
+        if self._primary_timezone is None:
+            try:
+                calendar_info = await self._execute(self.service.calendars().get(calendarId='primary'))
+                self._primary_timezone = calendar_info.get('timeZone', 'UTC')
+            except CalendarAuthError:
+                raise
+            except Exception:
+                return 'UTC'
+        return self._primary_timezone
+    
+    async def _prepare_event(self, title: str, start_time: datetime, end_time: datetime,
+                             description: str = "", attendees: List[str] = None,
+                             timezone: str = None) -> Dict[str, Any]:
+        """Build the insert arguments and result fields for one event"""
+        # Determine timezone
+        if timezone is None:
+            timezone = await self._get_primary_timezone()
+        
+        # Ensure datetime objects have timezone info
+        if start_time.tzinfo is None:
+            tz = _get_tz(timezone)
+            start_time = tz.localize(start_time)
+            end_time = tz.localize(end_time)
+        
+        # Create event object
+        event = {
+            'summary': title,
+            'description': description,
+            'start': {
+                'dateTime': start_time.isoformat(),
+                'timeZone': timezone,
+            },
+            'end': {
+                'dateTime': end_time.isoformat(),
+                'timeZone': timezone,
+            },
+        }
+        
+        # Add attendees if provided, stripping and dropping blanks in one pass
+        attendee_list = [{'email': cleaned} for email in (attendees or ()) if email and (cleaned := email.strip())]
+        if attendee_list:
+            event['attendees'] = attendee_list
+            event['sendUpdates'] = 'all'
+        
+        return {
+            "insert": {
+                "calendarId": 'primary',
+                "body": event,
+                "sendUpdates": 'all' if attendee_list else 'none'
+            },
+            "title": title,
+            "start_time": start_time,
+            "end_time": end_time,
+            "timezone": timezone,
+            "attendees": attendees
+        }
+    
+    @staticmethod
+    def _event_result(created_event: Dict[str, Any], prepared: Dict[str, Any]) -> Dict[str, Any]:
+        """Format an insert response as a create_event result"""
+        event_id = created_event.get('id')
+        
+        # The insert response is Google's authoritative copy of the event, so no read-back is
+        # done; "created" (not "verified") reports exactly that
+        return {
+            "success": True,
+            "event_id": event_id,
+            "event_link": created_event.get('htmlLink'),
+            "verification_link": f'https://calendar.google.com/calendar/r/eventedit/{event_id}',
+            "title": prepared["title"],
+            "start_time": prepared["start_time"].strftime("%Y-%m-%d %H:%M %Z"),
+            "end_time": prepared["end_time"].strftime("%Y-%m-%d %H:%M %Z"),
+            "timezone": prepared["timezone"],
+            "attendees": prepared["attendees"] or [],
+            "verification_status": "created",
+            "calendar_integration": "google_calendar",
+            "created_timestamp": datetime.now().isoformat()
+        }
+    
+    @staticmethod
+    def _http_error_details(error: HttpError) -> str:
+        """Describe a Google API error"""
+        return f"HTTP {error.resp.status}: {error.content.decode() if error.content else 'Unknown error'}"
+    
     async def create_event(self, title: str, start_time: datetime, end_time: datetime,
                           description: str = "", attendees: List[str] = None,
                           timezone: str = None) -> Dict[str, Any]:
@@ -78,103 +220,65 @@ class CalendarService:
             return {"success": False, "error": "Calendar service not initialized"}
         
         try:
-            # Determine timezone
-            if timezone is None:
-                try:
-                    calendar_info = self.service.calendars().get(calendarId='primary').execute()
-                    timezone = calendar_info.get('timeZone', 'UTC')
-                except:
-                    timezone = 'UTC'
-            
-            # Ensure datetime objects have timezone info
-            if start_time.tzinfo is None:
-                tz = pytz.timezone(timezone)
-                start_time = tz.localize(start_time)
-                end_time = tz.localize(end_time)
-            
-            # Create event object
-            event = {
-                'summary': title,
-                'description': description,
-                'start': {
-                    'dateTime': start_time.isoformat(),
-                    'timeZone': timezone,
-                },
-                'end': {
-                    'dateTime': end_time.isoformat(),
-                    'timeZone': timezone,
-                },
-            }
-            
-            # Add attendees if provided
-            if attendees and len(attendees) > 0:
-                event['attendees'] = [{'email': email.strip()} for email in attendees if email.strip()]
-                event['sendUpdates'] = 'all'
-            
-            # Create the event
-            created_event = self.service.events().insert(
-                calendarId='primary',
-                body=event,
-                sendUpdates='all' if attendees else 'none'
-            ).execute()
-            
-            event_id = created_event.get('id')
-            event_link = created_event.get('htmlLink')
-            
-            # Verify the event was created
-            try:
-                verification = self.service.events().get(
-                    calendarId='primary',
-                    eventId=event_id
-                ).execute()
-                
-                if verification:
-                    # Generate additional verification links
-                    verification_link = f'https://calendar.google.com/calendar/r/eventedit/{event_id}'
-
-                    return {
-                        "success": True,
-                        "event_id": event_id,
-                        "event_link": event_link,
-                        "verification_link": verification_link,
-                        "title": title,
-                        "start_time": start_time.strftime("%Y-%m-%d %H:%M %Z"),
-                        "end_time": end_time.strftime("%Y-%m-%d %H:%M %Z"),
-                        "timezone": timezone,
-                        "attendees": attendees or [],
-                        "verification_status": "verified",
-                        "calendar_integration": "google_calendar",
-                        "created_timestamp": datetime.now().isoformat()
-                    }
-                else:
-                    return {"success": False, "error": "Event created but verification failed"}
-                    
-            except Exception as verify_error:
-                # Generate verification link even if verification failed
-                verification_link = f'https://calendar.google.com/calendar/r/eventedit/{event_id}'
-
-                return {
-                    "success": True,
-                    "event_id": event_id,
-                    "event_link": event_link,
-                    "verification_link": verification_link,
-                    "title": title,
-                    "start_time": start_time.strftime("%Y-%m-%d %H:%M %Z"),
-                    "end_time": end_time.strftime("%Y-%m-%d %H:%M %Z"),
-                    "timezone": timezone,
-                    "attendees": attendees or [],
-                    "verification_status": "created_unverified",
-                    "calendar_integration": "google_calendar",
-                    "created_timestamp": datetime.now().isoformat(),
-                    "warning": f"Event created but verification failed: {str(verify_error)}"
-                }
+            prepared = await self._prepare_event(title, start_time, end_time, description, attendees, timezone)
+            created_event = await self._execute(self.service.events().insert(**prepared["insert"]))
+            return self._event_result(created_event, prepared)
             
+        except CalendarAuthError:
+            raise
         except HttpError as error:
-            error_details = f"HTTP {error.resp.status}: {error.content.decode() if error.content else 'Unknown error'}"
-            return {"success": False, "error": error_details}
+            return {"success": False, "error": self._http_error_details(error)}
         except Exception as error:
             return {"success": False, "error": f"Unexpected error creating event: {str(error)}"}
     
+    async def create_events_batch(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several events through batched HTTP requests
+
+        Each item holds create_event keyword arguments; results follow the input order.
+        """
+        if not self.service:
+            return [{"success": False, "error": "Calendar service not initialized"} for _ in events]
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(events)
+        prepared: Dict[str, Dict[str, Any]] = {}
+        for index, kwargs in enumerate(events):
+            try:
+                prepared[str(index)] = await self._prepare_event(**kwargs)
+            except CalendarAuthError:
+                raise
+            except Exception as error:
+                results[index] = {"success": False, "error": f"Unexpected error creating event: {str(error)}"}
+        
+        auth_errors = []
+        
+        def on_insert(request_id, response, exception):
+            if exception is None:
+                results[int(request_id)] = self._event_result(response, prepared[request_id])
+            elif isinstance(exception, HttpError):
+                if exception.resp.status == 401:
+                    auth_errors.append(exception)
+                results[int(request_id)] = {"success": False, "error": self._http_error_details(exception)}
+            else:
+                results[int(request_id)] = {"success": False, "error": f"Unexpected error creating event: {str(exception)}"}
+        
+        request_ids = list(prepared)
+        for offset in range(0, len(request_ids), _MAX_BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_insert)
+            for request_id in request_ids[offset:offset + _MAX_BATCH_SIZE]:
+                batch.add(self.service.events().insert(**prepared[request_id]["insert"]), request_id=request_id)
+            try:
+                await self._execute(batch)
+            except CalendarAuthError:
+                raise
+            except Exception as error:
+                for request_id in request_ids[offset:offset + _MAX_BATCH_SIZE]:
+                    if results[int(request_id)] is None:
+                        results[int(request_id)] = {"success": False, "error": f"Unexpected error creating event: {str(error)}"}
+            if auth_errors:
+                raise CalendarAuthError(self._http_error_details(auth_errors[0]))
+        
+        return results
+    
     async def list_events(self, time_min: datetime = None, time_max: datetime = None,
                          max_results: int = 10) -> List[Dict[str, Any]]:
         """List calendar events"""
@@ -187,14 +291,14 @@ class CalendarService:
             if not time_max:
                 time_max = time_min + timedelta(days=30)
             
-            events_result = self.service.events().list(
+            events_result = await self._execute(self.service.events().list(
                 calendarId='primary',
                 timeMin=time_min.isoformat(),
                 timeMax=time_max.isoformat(),
                 maxResults=max_results,
                 singleEvents=True,
                 orderBy='startTime'
-            ).execute()
+            ))
             
             events = events_result.get('items', [])
             
@@ -215,6 +319,8 @@ class CalendarService:
             
             return formatted_events
             
+        except CalendarAuthError:
+            raise
         except Exception:
             return []
     
@@ -224,10 +330,10 @@ class CalendarService:
             return None
         
         try:
-            event = self.service.events().get(
+            event = await self._execute(self.service.events().get(
                 calendarId='primary',
                 eventId=event_id
-            ).execute()
+            ))
             
             return {
                 'id': event.get('id'),
@@ -239,6 +345,8 @@ class CalendarService:
                 'created': event.get('created', ''),
                 'updated': event.get('updated', '')
             }
+        except CalendarAuthError:
+            raise
         except Exception:
             return None
     
@@ -248,11 +356,13 @@ class CalendarService:
             return False
         
         try:
-            event = self.service.events().get(
+            event = await self._execute(self.service.events().get(
                 calendarId='primary',
                 eventId=event_id
-            ).execute()
+            ))
             return bool(event)
+        except CalendarAuthError:
+            raise
         except:
             return False
     
@@ -266,5 +376,7 @@ class CalendarService:
             time_min = now - timedelta(hours=hours)
             
             return await self.list_events(time_min=time_min, time_max=now)
+        except CalendarAuthError:
+            raise
         except Exception:
             return []
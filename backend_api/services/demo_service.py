@@ -4,12 +4,91 @@ Provides mock data and responses for academic evaluation and demonstration
 """
 
 import os
-import json
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
-from dotenv import load_dotenv
+import re
+import random
+import secrets
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+import orjson
 
-load_dotenv('../.env.local')
+from utils.clock import now_iso
+
+# Keyword intents in priority order, each compiled to a single-pass matcher
+_INTENT_PATTERNS = (
+    ('schedule_meeting', re.compile('schedule|meeting|book|create')),
+    ('check_availability', re.compile('availability|available|free|busy')),
+    ('view_events', re.compile('show|view|list|events|meetings')),
+)
+
+# Sample events as (start offset, end offset, fields); times are filled in relative to startup
+_DEMO_EVENT_TEMPLATES = (
+    (timedelta(hours=2), timedelta(hours=2, minutes=30), {
+        'id': 'demo_event_1',
+        'title': 'Team Standup Meeting',
+        'description': 'Daily team standup meeting',
+        'attendees': ['john.doe@company.com', 'jane.smith@company.com'],
+        'location': 'Conference Room A',
+        'event_link': 'https://calendar.google.com/calendar/event?eid=demo_event_1'
+    }),
+    (timedelta(days=1, hours=10), timedelta(days=1, hours=11), {
+        'id': 'demo_event_2',
+        'title': 'Project Review',
+        'description': 'Quarterly project review meeting',
+        'attendees': ['manager@company.com'],
+        'location': 'Virtual Meeting',
+        'event_link': 'https://calendar.google.com/calendar/event?eid=demo_event_2'
+    }),
+    (timedelta(days=2, hours=14), timedelta(days=2, hours=15, minutes=30), {
+        'id': 'demo_event_3',
+        'title': 'Client Presentation',
+        'description': 'Presentation to key client stakeholders',
+        'attendees': ['client@external.com', 'sales@company.com'],
+        'location': 'Client Office',
+        'event_link': 'https://calendar.google.com/calendar/event?eid=demo_event_3'
+    }),
+)
+
+# Demo AI responses for common queries
+_DEMO_RESPONSES = {
+    'schedule_meeting': (
+        "I'll help you schedule that meeting! Let me create it in your calendar.",
+        "Perfect! I'm scheduling the meeting for you right now.",
+        "Great choice of time! I'll add this to your calendar immediately.",
+        "Excellent! I'm creating the calendar event for you."
+    ),
+    'check_availability': (
+        "Let me check your calendar availability for you.",
+        "I'll analyze your schedule to find the best available times.",
+        "Checking your calendar for free time slots...",
+        "Looking at your availability across the requested timeframe."
+    ),
+    'view_events': (
+        "Here are your upcoming events from your calendar.",
+        "Let me show you what's scheduled in your calendar.",
+        "Here's your calendar overview for the requested period.",
+        "These are your scheduled meetings and appointments."
+    ),
+    'general': (
+        "I'm here to help you manage your calendar and schedule meetings!",
+        "I can help you schedule meetings, check availability, and manage your calendar.",
+        "Feel free to ask me about scheduling meetings or checking your calendar.",
+        "I'm your AI assistant for all calendar and scheduling needs!"
+    )
+}
+
+# Daily free slots offered on each of the next seven days
+_DEMO_FREE_SLOTS = (('09:00', '10:00'), ('14:00', '15:00'), ('16:00', '17:00'))
+
+@lru_cache(maxsize=1)
+def _availability_for(day: date) -> Tuple[Dict[str, str], ...]:
+    """Build the demo free slots for the week after day; shared, so callers must not mutate them"""
+    return tuple(
+        {'date': slot_date, 'start_time': start, 'end_time': end, 'status': 'free'}
+        for slot_date in [(day + timedelta(days=i)).isoformat() for i in range(1, 8)]
+        for start, end in _DEMO_FREE_SLOTS
+    )
 
 class DemoService:
     """Demo service for academic evaluation and testing"""
@@ -23,67 +102,23 @@ class DemoService:
             'picture': 'https://via.placeholder.com/150/0066cc/ffffff?text=Demo'
         }
         
-        # Sample calendar events for demo
+        # Sample calendar events for demo, dated from a single clock read
+        now = datetime.now()
         self.demo_events = [
             {
-                'id': 'demo_event_1',
-                'title': 'Team Standup Meeting',
-                'start_time': (datetime.now() + timedelta(hours=2)).isoformat(),
-                'end_time': (datetime.now() + timedelta(hours=2, minutes=30)).isoformat(),
-                'description': 'Daily team standup meeting',
-                'attendees': ['john.doe@company.com', 'jane.smith@company.com'],
-                'location': 'Conference Room A',
-                'event_link': 'https://calendar.google.com/calendar/event?eid=demo_event_1'
-            },
-            {
-                'id': 'demo_event_2',
-                'title': 'Project Review',
-                'start_time': (datetime.now() + timedelta(days=1, hours=10)).isoformat(),
-                'end_time': (datetime.now() + timedelta(days=1, hours=11)).isoformat(),
-                'description': 'Quarterly project review meeting',
-                'attendees': ['manager@company.com'],
-                'location': 'Virtual Meeting',
-                'event_link': 'https://calendar.google.com/calendar/event?eid=demo_event_2'
-            },
-            {
-                'id': 'demo_event_3',
-                'title': 'Client Presentation',
-                'start_time': (datetime.now() + timedelta(days=2, hours=14)).isoformat(),
-                'end_time': (datetime.now() + timedelta(days=2, hours=15, minutes=30)).isoformat(),
-                'description': 'Presentation to key client stakeholders',
-                'attendees': ['client@external.com', 'sales@company.com'],
-                'location': 'Client Office',
-                'event_link': 'https://calendar.google.com/calendar/event?eid=demo_event_3'
+                **fields,
+                'start_time': (now + start_offset).isoformat(),
+                'end_time': (now + end_offset).isoformat()
             }
+            for start_offset, end_offset, fields in _DEMO_EVENT_TEMPLATES
         ]
-        
-        # Demo AI responses for common queries
-        self.demo_responses = {
-            'schedule_meeting': [
-                "I'll help you schedule that meeting! Let me create it in your calendar.",
-                "Perfect! I'm scheduling the meeting for you right now.",
-                "Great choice of time! I'll add this to your calendar immediately.",
-                "Excellent! I'm creating the calendar event for you."
-            ],
-            'check_availability': [
-                "Let me check your calendar availability for you.",
-                "I'll analyze your schedule to find the best available times.",
-                "Checking your calendar for free time slots...",
-                "Looking at your availability across the requested timeframe."
-            ],
-            'view_events': [
-                "Here are your upcoming events from your calendar.",
-                "Let me show you what's scheduled in your calendar.",
-                "Here's your calendar overview for the requested period.",
-                "These are your scheduled meetings and appointments."
-            ],
-            'general': [
-                "I'm here to help you manage your calendar and schedule meetings!",
-                "I can help you schedule meetings, check availability, and manage your calendar.",
-                "Feel free to ask me about scheduling meetings or checking your calendar.",
-                "I'm your AI assistant for all calendar and scheduling needs!"
-            ]
-        }
+
+        # Events sorted by start time for binary-search range queries
+        self._start_keys: List[datetime] = []
+        self._events_by_start: List[Dict[str, Any]] = []
+        for event in self.demo_events:
+            self._index_event(event)
+        self._events_json: Optional[bytes] = None
     
     def is_demo_mode(self) -> bool:
         """Check if demo mode is enabled"""
@@ -93,6 +128,27 @@ class DemoService:
         """Get demo user information"""
         return self.demo_user.copy()
     
+    @staticmethod
+    def _sort_key(value: str) -> datetime:
+        """Parse an ISO time into a naive datetime (aware times are taken as UTC)"""
+        dt = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return dt
+
+    def _index_event(self, event: Dict[str, Any]):
+        """Insert an event into the start-time index"""
+        key = self._sort_key(event['start_time'])
+        position = bisect_right(self._start_keys, key)
+        self._start_keys.insert(position, key)
+        self._events_by_start.insert(position, event)
+
+    def get_demo_events_json(self) -> bytes:
+        """Get all demo events pre-serialized as a JSON array"""
+        if self._events_json is None:
+            self._events_json = orjson.dumps(self.demo_events)
+        return self._events_json
+    
     def get_demo_events(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get demo calendar events"""
         if not start_date or not end_date:
@@ -100,23 +156,17 @@ class DemoService:
         
         # Filter events by date range (simplified for demo)
         try:
-            start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            
-            filtered_events = []
-            for event in self.demo_events:
-                event_start = datetime.fromisoformat(event['start_time'].replace('Z', '+00:00'))
-                if start_dt <= event_start <= end_dt:
-                    filtered_events.append(event)
-            
-            return filtered_events
+            start_dt = self._sort_key(start_date)
+            end_dt = self._sort_key(end_date)
+
+            lo = bisect_left(self._start_keys, start_dt)
+            hi = bisect_right(self._start_keys, end_dt)
+            return self._events_by_start[lo:hi]
         except:
             return self.demo_events.copy()
     
     def create_demo_event(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a demo calendar event"""
-        import secrets
-        
         # Generate demo event
         demo_event_id = f"demo_event_{secrets.token_hex(8)}"
         demo_event = {
@@ -134,6 +184,8 @@ class DemoService:
         
         # Add to demo events list
         self.demo_events.append(demo_event)
+        self._index_event(demo_event)
+        self._events_json = None
         
         return {
             'success': True,
@@ -148,19 +200,15 @@ class DemoService:
     
     def get_demo_ai_response(self, message: str, intent: str = 'general') -> Dict[str, Any]:
         """Get demo AI response based on message intent"""
-        import random
-        
         # Determine intent from message if not provided
         message_lower = message.lower()
-        if any(word in message_lower for word in ['schedule', 'meeting', 'book', 'create']):
-            intent = 'schedule_meeting'
-        elif any(word in message_lower for word in ['availability', 'available', 'free', 'busy']):
-            intent = 'check_availability'
-        elif any(word in message_lower for word in ['show', 'view', 'list', 'events', 'meetings']):
-            intent = 'view_events'
+        for candidate, pattern in _INTENT_PATTERNS:
+            if pattern.search(message_lower):
+                intent = candidate
+                break
         
         # Get appropriate response
-        responses = self.demo_responses.get(intent, self.demo_responses['general'])
+        responses = _DEMO_RESPONSES.get(intent, _DEMO_RESPONSES['general'])
         base_response = random.choice(responses)
         
         # Add demo-specific context
@@ -199,36 +247,24 @@ class DemoService:
                 'intent': intent
             }
     
+    async def stream_demo_ai_response(self, message: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a demo AI response word by word, then its metadata"""
+        response = self.get_demo_ai_response(message)
+        text = response.pop('response')
+
+        for word in text.split(' '):
+            yield {'delta': word + ' '}
+
+        yield {
+            **response,
+            'done': True,
+            'timestamp': now_iso(),
+            'demo_note': 'This is a simulated AI response for evaluation purposes.'
+        }
+    
     def _get_demo_availability(self) -> List[Dict[str, str]]:
         """Get demo availability slots"""
-        now = datetime.now()
-        availability = []
-        
-        # Generate some demo free slots
-        for i in range(1, 8):  # Next 7 days
-            date = now + timedelta(days=i)
-            availability.extend([
-                {
-                    'date': date.strftime('%Y-%m-%d'),
-                    'start_time': '09:00',
-                    'end_time': '10:00',
-                    'status': 'free'
-                },
-                {
-                    'date': date.strftime('%Y-%m-%d'),
-                    'start_time': '14:00',
-                    'end_time': '15:00',
-                    'status': 'free'
-                },
-                {
-                    'date': date.strftime('%Y-%m-%d'),
-                    'start_time': '16:00',
-                    'end_time': '17:00',
-                    'status': 'free'
-                }
-            ])
-        
-        return availability
+        return list(_availability_for(date.today()))
     
     def get_demo_oauth_config(self) -> Dict[str, Any]:
         """Get demo OAuth configuration"""
@@ -243,7 +279,6 @@ class DemoService:
     
     def get_demo_auth_url(self) -> Dict[str, Any]:
         """Get demo authorization URL"""
-        import secrets
         state = secrets.token_urlsafe(32)
         
         return {
@@ -4,22 +4,39 @@ Professional Google OAuth 2.0 integration with enhanced security
 """
 
 import os
-import json
+import base64
+import orjson
 import secrets
 import time
+from functools import lru_cache
 from typing import Dict, Any, Optional, Tuple
 from urllib.parse import urlencode
-import requests
-from dotenv import load_dotenv
+from cachetools import TTLCache
 
-# Load environment variables
-load_dotenv('../.env.local')
+from utils.http_client import get_http_client
+from utils.redis_client import get_redis
+
+STATE_KEY_PREFIX = "oauth:state:"
+STATE_TTL_SECONDS = 600
+
+DEFAULT_SCOPES = (
+    'https://www.googleapis.com/auth/calendar.readonly,'
+    'https://www.googleapis.com/auth/calendar.events,'
+    'https://www.googleapis.com/auth/userinfo.email,'
+    'https://www.googleapis.com/auth/userinfo.profile'
+)
+
+@lru_cache(maxsize=8)
+def _parse_scopes(scopes_str: str) -> Tuple[str, ...]:
+    """Split a comma-separated OAUTH_SCOPES value, once per distinct value"""
+    return tuple(scope.strip() for scope in scopes_str.split(','))
 
 class OAuthService:
     """Handle Google OAuth 2.0 flow for FastAPI backend"""
 
-    # Class-level state storage to persist across instances
-    _global_state_store = {}
+    # Class-level state storage used when Redis is not configured; abandoned
+    # flows expire after 10 minutes and the store is size-bounded
+    _global_state_store = TTLCache(maxsize=10_000, ttl=STATE_TTL_SECONDS)
 
     def __init__(self):
         """Initialize OAuth service with configuration"""
@@ -29,6 +46,16 @@ class OAuthService:
         self.scopes = self._get_scopes()
         self.frontend_url = self._get_frontend_url()
 
+        # Everything but the state is fixed per instance, so encode it once
+        self._auth_url_prefix = "https://accounts.google.com/o/oauth2/v2/auth?" + urlencode({
+            'client_id': self.client_id,
+            'redirect_uri': self.redirect_uri,
+            'scope': ' '.join(self.scopes),
+            'response_type': 'code',
+            'access_type': 'offline',
+            'prompt': 'consent'
+        }) + "&state="
+
         # Use class-level state storage
         self._state_store = OAuthService._global_state_store
         
@@ -52,15 +79,9 @@ class OAuthService:
         base_url = os.getenv('API_BASE_URL', 'http://localhost:8000')
         return f"{base_url}/api/v1/oauth/callback"
     
-    def _get_scopes(self) -> list:
+    def _get_scopes(self) -> Tuple[str, ...]:
         """Get OAuth scopes"""
-        scopes_str = os.getenv('OAUTH_SCOPES', 
-            'https://www.googleapis.com/auth/calendar.readonly,'
-            'https://www.googleapis.com/auth/calendar.events,'
-            'https://www.googleapis.com/auth/userinfo.email,'
-            'https://www.googleapis.com/auth/userinfo.profile'
-        )
-        return [scope.strip() for scope in scopes_str.split(',')]
+        return _parse_scopes(os.getenv('OAUTH_SCOPES', DEFAULT_SCOPES))
     
     def _get_frontend_url(self) -> str:
         """Get frontend URL for redirects"""
@@ -88,125 +109,27 @@ class OAuthService:
         if not self.is_configured():
             raise ValueError("OAuth not configured")
         
-        # Generate state for CSRF protection
+        # Generate state for CSRF protection; token_urlsafe output needs no escaping
         state = secrets.token_urlsafe(32)
         
-        # OAuth parameters
-        params = {
-            'client_id': self.client_id,
-            'redirect_uri': self.redirect_uri,
-            'scope': ' '.join(self.scopes),
-            'response_type': 'code',
-            'state': state,
-            'access_type': 'offline',
-            'prompt': 'consent'
-        }
-        
-        auth_url = f"https://accounts.google.com/o/oauth2/v2/auth?{urlencode(params)}"
-        
-        return auth_url, state
+        return self._auth_url_prefix + state, state
     
-    def store_state(self, state: str):
+    async def store_state(self, state: str):
         """Store OAuth state for verification"""
-        state_data = {
-            'timestamp': time.time(),
-            'used': False
-        }
-
-        # Store in memory
-        self._state_store[state] = state_data
-
-        # Also store in file as backup
-        try:
-            import tempfile
-            import json
-            temp_dir = tempfile.gettempdir()
-            state_file = os.path.join(temp_dir, f"oauth_state_{state[:16]}.json")
-            with open(state_file, 'w') as f:
-                json.dump({
-                    'state': state,
-                    'timestamp': state_data['timestamp'],
-                    'used': state_data['used']
-                }, f)
-        except Exception:
-            pass  # File backup is optional
-
-        # Clean up old states (older than 1 hour)
-        current_time = time.time()
-        expired_states = [
-            s for s, data in self._state_store.items()
-            if current_time - data['timestamp'] > 3600
-        ]
-        for expired_state in expired_states:
-            del self._state_store[expired_state]
-    
-    def verify_state(self, state: str) -> bool:
-        """Verify OAuth state parameter"""
-        state_data = None
-
-        # First check in-memory store
-        if state in self._state_store:
-            state_data = self._state_store[state]
+        redis = get_redis()
+        if redis is not None:
+            await redis.set(f"{STATE_KEY_PREFIX}{state}", "1", ex=STATE_TTL_SECONDS, nx=True)
         else:
-            # Try to recover from file backup
-            try:
-                import tempfile
-                import json
-                import glob
-                temp_dir = tempfile.gettempdir()
-                state_files = glob.glob(os.path.join(temp_dir, f"oauth_state_{state[:16]}.json"))
-
-                for state_file in state_files:
-                    try:
-                        with open(state_file, 'r') as f:
-                            file_data = json.load(f)
-                            if file_data.get('state') == state:
-                                state_data = {
-                                    'timestamp': file_data.get('timestamp', 0),
-                                    'used': file_data.get('used', False)
-                                }
-                                # Restore to memory
-                                self._state_store[state] = state_data
-                                break
-                    except Exception:
-                        continue
-            except Exception:
-                pass
-
-        if not state_data:
-            return False
-
-        # Check if already used
-        if state_data['used']:
-            return False
-
-        # Check if expired (1 hour)
-        if time.time() - state_data['timestamp'] > 3600:
-            if state in self._state_store:
-                del self._state_store[state]
-            return False
-
-        # Mark as used
-        state_data['used'] = True
-
-        # Update file backup
-        try:
-            import tempfile
-            import json
-            temp_dir = tempfile.gettempdir()
-            state_file = os.path.join(temp_dir, f"oauth_state_{state[:16]}.json")
-            with open(state_file, 'w') as f:
-                json.dump({
-                    'state': state,
-                    'timestamp': state_data['timestamp'],
-                    'used': state_data['used']
-                }, f)
-        except Exception:
-            pass
-
-        return True
+            self._state_store[state] = True
     
-    def exchange_code_for_tokens(self, auth_code: str, state: str) -> Optional[Dict[str, Any]]:
+    async def verify_state(self, state: str) -> bool:
+        """Verify OAuth state parameter (single use)"""
+        redis = get_redis()
+        if redis is not None:
+            return await redis.delete(f"{STATE_KEY_PREFIX}{state}") == 1
+        return self._state_store.pop(state, False)
+    
+    async def exchange_code_for_tokens(self, auth_code: str, state: str) -> Optional[Dict[str, Any]]:
         """Exchange authorization code for access tokens"""
         if not self.is_configured():
             return None
@@ -222,25 +145,25 @@ class OAuthService:
         
         try:
             # Exchange code for tokens
-            response = requests.post(
+            response = await get_http_client().post(
                 'https://oauth2.googleapis.com/token',
                 data=token_data,
-                headers={'Content-Type': 'application/x-www-form-urlencoded'},
                 timeout=30
             )
             
             if response.status_code == 200:
-                tokens = response.json()
+                tokens = orjson.loads(response.content)
                 
                 # Add expiration timestamp
                 if 'expires_in' in tokens:
                     tokens['expires_at'] = int(time.time()) + tokens['expires_in']
                 
-                # Get user info
-                if 'access_token' in tokens:
-                    user_info = self.get_user_info(tokens['access_token'])
-                    if user_info:
-                        tokens['user_info'] = user_info
+                # Get user info, from the ID token when Google sent one, saving a round-trip
+                user_info = self._user_info_from_id_token(tokens.get('id_token'))
+                if user_info is None and 'access_token' in tokens:
+                    user_info = await self.get_user_info(tokens['access_token'])
+                if user_info:
+                    tokens['user_info'] = user_info
                 
                 return tokens
             else:
@@ -249,7 +172,30 @@ class OAuthService:
         except Exception:
             return None
     
-    def refresh_access_token(self, refresh_token: str) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _user_info_from_id_token(id_token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Read userinfo-style fields from an ID token's claims
+
+        The token comes straight from Google's token endpoint over TLS, so its
+        signature need not be checked (OpenID Connect Core 3.1.3.7).
+        """
+        if not id_token:
+            return None
+        try:
+            payload = id_token.split('.')[1]
+            claims = orjson.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        except Exception:
+            return None
+        if 'email' not in claims:
+            return None
+        # Same field names as the userinfo v2 endpoint
+        user_info = {'id': claims.get('sub'), 'email': claims['email'], 'verified_email': claims.get('email_verified')}
+        for field in ('name', 'given_name', 'family_name', 'picture', 'locale'):
+            if field in claims:
+                user_info[field] = claims[field]
+        return user_info
+    
+    async def refresh_access_token(self, refresh_token: str) -> Optional[Dict[str, Any]]:
         """Refresh access token using refresh token"""
         if not self.is_configured():
             return None
@@ -262,15 +208,14 @@ class OAuthService:
         }
         
         try:
-            response = requests.post(
+            response = await get_http_client().post(
                 'https://oauth2.googleapis.com/token',
                 data=refresh_data,
-                headers={'Content-Type': 'application/x-www-form-urlencoded'},
                 timeout=30
             )
             
             if response.status_code == 200:
-                tokens = response.json()
+                tokens = orjson.loads(response.content)
                 
                 # Add expiration timestamp
                 if 'expires_in' in tokens:
@@ -283,28 +228,29 @@ class OAuthService:
         except Exception:
             return None
     
-    def get_user_info(self, access_token: str) -> Optional[Dict[str, Any]]:
+    async def get_user_info(self, access_token: str) -> Optional[Dict[str, Any]]:
         """Get user information from Google"""
         try:
-            response = requests.get(
+            response = await get_http_client().get(
                 'https://www.googleapis.com/oauth2/v2/userinfo',
                 headers={'Authorization': f'Bearer {access_token}'},
                 timeout=30
             )
             
             if response.status_code == 200:
-                return response.json()
+                return orjson.loads(response.content)
             else:
                 return None
                 
         except Exception:
             return None
     
-    def revoke_token(self, token: str) -> bool:
+    async def revoke_token(self, token: str) -> bool:
         """Revoke access token"""
         try:
-            response = requests.post(
-                f'https://oauth2.googleapis.com/revoke?token={token}',
+            response = await get_http_client().post(
+                'https://oauth2.googleapis.com/revoke',
+                data={'token': token},
                 timeout=30
             )
             return response.status_code == 200
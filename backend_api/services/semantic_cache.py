@@ -0,0 +1,120 @@
+"""
+Semantic Response Cache for TailorTalk API
+Reuses AI replies for near-duplicate messages using local sentence embeddings
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+MAX_ENTRIES = 1024
+HISTORY_TURNS = 2
+
+
+class SemanticCache:
+    """In-memory nearest-neighbour cache of AI results keyed by message embedding"""
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, max_entries: int = MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.enabled = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+        self._model = None
+        self._np = None
+        self._load_lock = threading.Lock()
+        # Parallel stores: embedding rows, context scopes, cached results and last-use ticks
+        self._vecs = None
+        self._scopes: List[str] = []
+        self._vals: List[Dict[str, Any]] = []
+        self._last_used = None
+        self._tick = 0
+
+    def _load_model(self):
+        """Load the embedding model once; disable the cache if it is unavailable"""
+        with self._load_lock:
+            if self._model is not None or not self.enabled:
+                return self._model
+            try:
+                import numpy as np
+                from sentence_transformers import SentenceTransformer
+                self._np = np
+                self._model = SentenceTransformer(EMBEDDING_MODEL)
+                dim = self._model.get_sentence_embedding_dimension()
+                self._vecs = np.empty((0, dim), dtype=np.float32)
+                self._last_used = np.empty(0, dtype=np.int64)
+            except ImportError:
+                self.enabled = False
+            except Exception:
+                self.enabled = False
+            return self._model
+
+    async def warm_up(self):
+        """Load the embedding model off the event loop so the first request doesn't pay for it"""
+        if self.enabled:
+            await asyncio.to_thread(self._load_model)
+
+    def _encode(self, message: str):
+        """Embed a message as an L2-normalized float32 vector"""
+        model = self._model or self._load_model()
+        if model is None:
+            return None
+        return model.encode(message, normalize_embeddings=True).astype(self._np.float32)
+
+    @staticmethod
+    def scope_for(provider: str, chat_history: Optional[List[Dict]],
+                  session_id: Optional[str] = None) -> Optional[str]:
+        """Fingerprint the provider, session and recent history so hits never cross conversations
+
+        Returns None when there is neither a session nor any history to tell
+        callers apart; such requests must bypass the cache.
+        """
+        if not session_id and not chat_history:
+            return None
+        digest = hashlib.blake2b(provider.encode(), digest_size=16)
+        digest.update(b"\x00" + (session_id or "").encode())
+        for msg in (chat_history or [])[-HISTORY_TURNS:]:
+            digest.update(b"\x00" + msg.get('role', 'user').encode())
+            digest.update(b"\x00" + str(msg.get('content', '')).encode())
+        return digest.hexdigest()
+
+    async def embed(self, message: str):
+        """Embed a message off the event loop; returns None when the cache is disabled"""
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self._encode, message)
+
+    def lookup(self, vector, scope: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the closest cached result at or above the similarity threshold"""
+        if vector is None or not self._vals:
+            return None
+        sims = self._vecs @ vector
+        best = int(sims.argmax())
+        while sims[best] >= self.threshold:
+            if self._scopes[best] == scope:
+                self._tick += 1
+                self._last_used[best] = self._tick
+                return dict(self._vals[best])
+            sims[best] = -1.0
+            best = int(sims.argmax())
+        return None
+
+    def add(self, vector, scope: str, result: Dict[str, Any]):
+        """Store a result, overwriting the least recently used entry once full"""
+        if vector is None:
+            return
+        self._tick += 1
+        if len(self._vals) < self.max_entries:
+            self._vecs = self._np.vstack((self._vecs, vector[None, :]))
+            self._last_used = self._np.append(self._last_used, self._tick)
+            self._scopes.append(scope)
+            self._vals.append(dict(result))
+            return
+
+        slot = int(self._last_used.argmin())
+        self._vecs[slot] = vector
+        self._last_used[slot] = self._tick
+        self._scopes[slot] = scope
+        self._vals[slot] = dict(result)
@@ -4,16 +4,58 @@ Migrated from backend/token_manager.py to work with FastAPI
 """
 
 import os
-import json
 import base64
+import hashlib
+import orjson
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from dotenv import load_dotenv
+from cachetools import TTLCache
 
-# Load environment variables
-load_dotenv('../.env.local')
+from utils.redis_client import get_redis
+
+SESSION_KEY_PREFIX = "sess:"
+SESSION_TTL_SECONDS = 600
+
+# Every Fernet token starts with its version byte 0x80, base64-encoded
+_FERNET_PREFIX = b"gAAAAA"
+
+@lru_cache(maxsize=4)
+def _derive_fernet_key(key_str: str) -> Optional[str]:
+    """Turn ENCRYPTION_KEY into a Fernet key; cached since PBKDF2 runs 100k rounds"""
+    if not key_str or key_str == 'your_encryption_key_here':
+        return None
+
+    try:
+        # If it's a base64 encoded key, return it as-is (Fernet expects base64 string)
+        if len(key_str) == 44 and key_str.endswith('='):
+            # Validate it's a proper base64 key by trying to decode it
+            base64.urlsafe_b64decode(key_str.encode())
+            return key_str
+
+        # Otherwise, derive key from string
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=b'tailortalk_salt',
+            iterations=100000,
+        )
+        derived_key = kdf.derive(key_str.encode())
+        return base64.urlsafe_b64encode(derived_key).decode()
+    except Exception as e:
+        # If all else fails, generate a simple key from the string
+        try:
+            # Pad or truncate to 32 bytes
+            key_bytes = key_str.encode('utf-8')
+            if len(key_bytes) < 32:
+                key_bytes = key_bytes + b'0' * (32 - len(key_bytes))
+            else:
+                key_bytes = key_bytes[:32]
+            return base64.urlsafe_b64encode(key_bytes).decode()
+        except:
+            return None
 
 class TokenService:
     """Secure token management for OAuth tokens"""
@@ -23,44 +65,13 @@ class TokenService:
         self.encryption_key = self._get_encryption_key()
         self.cipher = Fernet(self.encryption_key) if self.encryption_key else None
         
-        # In-memory token storage (use Redis/database in production)
-        self._token_store = {}
+        # In-memory token storage, used when Redis is not configured:
+        # user_id -> (encrypted tokens, expires_at or None, has refresh token)
+        self._token_store = TTLCache(maxsize=10_000, ttl=SESSION_TTL_SECONDS)
     
     def _get_encryption_key(self) -> Optional[str]:
         """Get or generate encryption key"""
-        key_str = os.getenv('ENCRYPTION_KEY', '')
-
-        if not key_str or key_str == 'your_encryption_key_here':
-            return None
-
-        try:
-            # If it's a base64 encoded key, return it as-is (Fernet expects base64 string)
-            if len(key_str) == 44 and key_str.endswith('='):
-                # Validate it's a proper base64 key by trying to decode it
-                base64.urlsafe_b64decode(key_str.encode())
-                return key_str
-
-            # Otherwise, derive key from string
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=b'tailortalk_salt',
-                iterations=100000,
-            )
-            derived_key = kdf.derive(key_str.encode())
-            return base64.urlsafe_b64encode(derived_key).decode()
-        except Exception as e:
-            # If all else fails, generate a simple key from the string
-            try:
-                # Pad or truncate to 32 bytes
-                key_bytes = key_str.encode('utf-8')
-                if len(key_bytes) < 32:
-                    key_bytes = key_bytes + b'0' * (32 - len(key_bytes))
-                else:
-                    key_bytes = key_bytes[:32]
-                return base64.urlsafe_b64encode(key_bytes).decode()
-            except:
-                return None
+        return _derive_fernet_key(os.getenv('ENCRYPTION_KEY', ''))
     
     def encrypt_tokens(self, tokens: Dict[str, Any]) -> Optional[str]:
         """Encrypt OAuth tokens for secure storage"""
@@ -68,9 +79,8 @@ class TokenService:
             return None
         
         try:
-            token_json = json.dumps(tokens)
-            encrypted_data = self.cipher.encrypt(token_json.encode())
-            return base64.urlsafe_b64encode(encrypted_data).decode()
+            # Fernet tokens are already URL-safe base64, so store them as-is
+            return self.cipher.encrypt(orjson.dumps(tokens)).decode()
         except Exception:
             return None
     
@@ -80,35 +90,69 @@ class TokenService:
             return None
         
         try:
-            encrypted_data = base64.urlsafe_b64decode(encrypted_tokens.encode())
+            encrypted_data = encrypted_tokens.encode()
+            if not encrypted_data.startswith(_FERNET_PREFIX):
+                # Written before tokens were stored unwrapped; sessions expire within SESSION_TTL_SECONDS
+                encrypted_data = base64.urlsafe_b64decode(encrypted_data)
             decrypted_data = self.cipher.decrypt(encrypted_data)
-            return json.loads(decrypted_data.decode())
+            return orjson.loads(decrypted_data)
         except Exception:
             return None
     
-    def store_tokens(self, user_id: str, tokens: Dict[str, Any]) -> bool:
+    async def store_tokens(self, user_id: str, tokens: Dict[str, Any]) -> bool:
         """Store tokens securely for a user"""
         encrypted_tokens = self.encrypt_tokens(tokens)
-        if encrypted_tokens:
-            self._token_store[user_id] = encrypted_tokens
-            return True
-        return False
+        if not encrypted_tokens:
+            return False
+
+        redis = get_redis()
+        if redis is not None:
+            await redis.setex(f"{SESSION_KEY_PREFIX}{user_id}", SESSION_TTL_SECONDS, encrypted_tokens)
+        else:
+            # Expiry is not secret, so keep it beside the ciphertext for cleanup to read
+            self._token_store[user_id] = (encrypted_tokens, tokens.get('expires_at'), 'refresh_token' in tokens)
+        return True
     
-    def retrieve_tokens(self, user_id: str) -> Optional[Dict[str, Any]]:
+    async def retrieve_tokens(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve tokens securely for a user"""
-        encrypted_tokens = self._token_store.get(user_id)
+        redis = get_redis()
+        if redis is not None:
+            encrypted_tokens = await redis.get(f"{SESSION_KEY_PREFIX}{user_id}")
+        else:
+            entry = self._token_store.get(user_id)
+            encrypted_tokens = entry[0] if entry else None
         if encrypted_tokens:
-            return self.decrypt_tokens(encrypted_tokens)
+            return self.decrypt_tokens(self._as_str(encrypted_tokens))
+        return None
+
+    async def take_tokens(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieve and delete tokens in one step (single-use sessions)"""
+        redis = get_redis()
+        if redis is not None:
+            encrypted_tokens = await redis.getdel(f"{SESSION_KEY_PREFIX}{user_id}")
+        else:
+            entry = self._token_store.pop(user_id, None)
+            encrypted_tokens = entry[0] if entry else None
+        if encrypted_tokens:
+            return self.decrypt_tokens(self._as_str(encrypted_tokens))
         return None
     
-    def clear_tokens(self, user_id: str):
+    async def clear_tokens(self, user_id: str):
         """Clear stored tokens for a user"""
-        if user_id in self._token_store:
-            del self._token_store[user_id]
+        redis = get_redis()
+        if redis is not None:
+            await redis.delete(f"{SESSION_KEY_PREFIX}{user_id}")
+        else:
+            self._token_store.pop(user_id, None)
 
-    def delete_tokens(self, user_id: str):
+    async def delete_tokens(self, user_id: str):
         """Delete stored tokens for a user (alias for clear_tokens)"""
-        self.clear_tokens(user_id)
+        await self.clear_tokens(user_id)
+
+    @staticmethod
+    def _as_str(value) -> str:
+        """Normalize a stored value (Redis returns bytes)"""
+        return value.decode() if isinstance(value, bytes) else value
     
     def is_token_valid(self, tokens: Dict[str, Any]) -> bool:
         """Check if tokens are still valid"""
@@ -127,23 +171,23 @@ class TokenService:
         # If no expiration info, assume valid for now
         return True
     
-    def refresh_tokens_if_needed(self, user_id: str, oauth_service) -> Optional[Dict[str, Any]]:
+    async def refresh_tokens_if_needed(self, user_id: str, oauth_service) -> Optional[Dict[str, Any]]:
         """Refresh tokens if they're expired"""
-        tokens = self.retrieve_tokens(user_id)
+        tokens = await self.retrieve_tokens(user_id)
         
         if not tokens:
             return None
         
         if not self.is_token_valid(tokens) and 'refresh_token' in tokens:
             # Try to refresh
-            new_tokens = oauth_service.refresh_access_token(tokens['refresh_token'])
+            new_tokens = await oauth_service.refresh_access_token(tokens['refresh_token'])
             if new_tokens:
                 # Merge with existing tokens (keep refresh_token and user_info)
                 updated_tokens = tokens.copy()
                 updated_tokens.update(new_tokens)
                 
                 # Store updated tokens
-                self.store_tokens(user_id, updated_tokens)
+                await self.store_tokens(user_id, updated_tokens)
                 return updated_tokens
         
         return tokens if self.is_token_valid(tokens) else None
@@ -152,20 +196,17 @@ class TokenService:
         """Get user ID from access token (for session management)"""
         # In a real implementation, you might decode the token or call Google API
         # For now, we'll use a simple hash of the token
-        import hashlib
-        return hashlib.md5(access_token.encode()).hexdigest()
+        return hashlib.blake2b(access_token.encode(), digest_size=16).hexdigest()
     
     def cleanup_expired_tokens(self):
         """Clean up expired tokens from storage"""
         import time
         current_time = time.time()
         
-        expired_users = []
-        for user_id, encrypted_tokens in self._token_store.items():
-            tokens = self.decrypt_tokens(encrypted_tokens)
-            if tokens and 'expires_at' in tokens:
-                if current_time > tokens['expires_at'] and 'refresh_token' not in tokens:
-                    expired_users.append(user_id)
+        expired_users = [
+            user_id for user_id, (_, expires_at, has_refresh) in self._token_store.items()
+            if expires_at is not None and current_time > expires_at and not has_refresh
+        ]
         
         for user_id in expired_users:
             del self._token_store[user_id]
@@ -0,0 +1,33 @@
+"""
+Utilities for TailorTalk Backend
+"""
+
+from .orjson_response import ORJSONResponse
+from .msgpack_response import MsgPackResponse, negotiated_response
+from .http_client import get_http_client, close_http_client
+from .token_pool import fill_token_pool, pooled_token_urlsafe
+from .redis_client import init_redis, get_redis, close_redis
+from .static_response import StaticPayload, static_json_response
+from .clock import start_clock, stop_clock, now_iso, now_json
+from .sse import sse_events, sse_response
+
+__all__ = [
+    "ORJSONResponse",
+    "MsgPackResponse",
+    "negotiated_response",
+    "get_http_client",
+    "close_http_client",
+    "fill_token_pool",
+    "pooled_token_urlsafe",
+    "init_redis",
+    "get_redis",
+    "close_redis",
+    "StaticPayload",
+    "static_json_response",
+    "start_clock",
+    "stop_clock",
+    "now_iso",
+    "now_json",
+    "sse_events",
+    "sse_response"
+]
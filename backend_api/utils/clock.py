@@ -0,0 +1,60 @@
+"""
+Cached Wall Clock for TailorTalk API
+ISO timestamp refreshed once per second for response payloads
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+_now_iso: str = ""
+_now_json: bytes = b""
+_tick_task: Optional[asyncio.Task] = None
+
+
+def _refresh():
+    """Recompute the cached timestamp"""
+    global _now_iso, _now_json
+    _now_iso = datetime.now().isoformat()
+    _now_json = f'"{_now_iso}"'.encode()
+
+
+async def _tick():
+    """Refresh the cached timestamp every second"""
+    while True:
+        _refresh()
+        await asyncio.sleep(1)
+
+
+def start_clock():
+    """Start the background refresh task"""
+    global _tick_task
+    if _tick_task is None:
+        _refresh()
+        _tick_task = asyncio.get_running_loop().create_task(_tick())
+
+
+async def stop_clock():
+    """Stop the background refresh task"""
+    global _tick_task
+    if _tick_task is not None:
+        _tick_task.cancel()
+        try:
+            await _tick_task
+        except asyncio.CancelledError:
+            pass
+        _tick_task = None
+
+
+def now_iso() -> str:
+    """Current local time as an ISO string, accurate to about a second"""
+    if _tick_task is None:
+        _refresh()
+    return _now_iso
+
+
+def now_json() -> bytes:
+    """now_iso() as a JSON string literal"""
+    if _tick_task is None:
+        _refresh()
+    return _now_json
@@ -0,0 +1,30 @@
+"""
+Shared HTTP Client for TailorTalk API
+One pooled httpx.AsyncClient reused for outbound Google and AI provider calls
+"""
+
+from typing import Optional
+
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100)
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared async HTTP client"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
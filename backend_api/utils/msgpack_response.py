@@ -0,0 +1,37 @@
+"""
+MessagePack Response for TailorTalk API
+Compact binary response for clients that send Accept: application/x-msgpack
+"""
+
+from typing import Any, Optional
+
+import msgpack
+from fastapi import Request
+from fastapi.responses import Response
+
+from .orjson_response import ORJSONResponse
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+
+class MsgPackResponse(Response):
+    """Response rendered with msgpack"""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        """Serialize content to msgpack bytes"""
+        return msgpack.packb(content, default=str, use_bin_type=True)
+
+
+def negotiated_response(request: Request, content: Any, json_body: Optional[bytes] = None) -> Response:
+    """Return msgpack if the client accepts it, otherwise JSON
+
+    json_body may carry content already serialized to JSON, which is then
+    sent as-is instead of serializing content again.
+    """
+    if MSGPACK_MEDIA_TYPE in request.headers.get("accept", ""):
+        return MsgPackResponse(content)
+    if json_body is not None:
+        return Response(content=json_body, media_type="application/json")
+    return ORJSONResponse(content)
@@ -0,0 +1,23 @@
+"""
+ORJSON Response for TailorTalk API
+Fast JSON response class used as the default for all routers
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib json module"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        """Serialize content to JSON bytes"""
+        return orjson.dumps(
+            content,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS
+        )
@@ -0,0 +1,35 @@
+"""
+Shared Redis Client for TailorTalk API
+Optional cross-worker store, enabled when REDIS_URL is set
+"""
+
+import os
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import redis.asyncio
+
+_redis = None
+
+
+def init_redis() -> Optional["redis.asyncio.Redis"]:
+    """Connect the shared async Redis client if REDIS_URL is configured"""
+    global _redis
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url and _redis is None:
+        import redis.asyncio as aioredis
+        _redis = aioredis.Redis.from_url(redis_url)
+    return _redis
+
+
+def get_redis() -> Optional["redis.asyncio.Redis"]:
+    """Get the shared async Redis client, or None when running without Redis"""
+    return _redis
+
+
+async def close_redis():
+    """Close the shared async Redis client"""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -0,0 +1,24 @@
+"""
+Server-Sent Events for TailorTalk API
+Streams dict chunks to the client as orjson-encoded SSE frames
+"""
+
+from typing import Any, AsyncIterator, Dict
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+
+async def sse_events(chunks: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Frame response chunks as Server-Sent Events"""
+    async for chunk in chunks:
+        yield b"data: " + orjson.dumps(chunk) + b"\n\n"
+
+
+def sse_response(chunks: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Stream chunks to the client as text/event-stream"""
+    return StreamingResponse(
+        sse_events(chunks),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
@@ -0,0 +1,54 @@
+"""
+Static JSON Responses for TailorTalk API
+Constant payloads serialized, compressed and ETagged once at import
+"""
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Any
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+STATIC_CACHE_CONTROL = "public, max-age=3600, immutable"
+
+
+@dataclass(slots=True, frozen=True)
+class StaticPayload:
+    """Pre-serialized JSON body with its gzip variant and weak ETag"""
+    raw: bytes
+    gz: bytes
+    etag: str
+
+    @classmethod
+    def build(cls, content: Any) -> "StaticPayload":
+        """Serialize content once for repeated serving"""
+        raw = orjson.dumps(content)
+        return cls(
+            raw=raw,
+            gz=gzip.compress(raw, compresslevel=6),
+            etag=f'W/"{hashlib.sha256(raw).hexdigest()[:16]}"'
+        )
+
+
+def static_json_response(request: Request, payload: StaticPayload) -> Response:
+    """Serve a static payload, honouring If-None-Match and Accept-Encoding"""
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": STATIC_CACHE_CONTROL,
+        "Vary": "Accept-Encoding"
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*" or
+        payload.etag in (tag.strip() for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gz, media_type="application/json", headers=headers)
+    return Response(content=payload.raw, media_type="application/json", headers=headers)
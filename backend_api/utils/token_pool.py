@@ -0,0 +1,57 @@
+"""
+Session Token Pool for TailorTalk API
+Pre-generated urlsafe tokens so OAuth callbacks don't hit os.urandom per request
+"""
+
+import asyncio
+import base64
+import os
+from collections import deque
+from typing import Deque, List, Optional
+
+TOKEN_BYTES = 32
+_POOL_SIZE = 1024
+_LOW_WATERMARK = 128
+
+_token_pool: Deque[str] = deque()
+_refill_task: Optional[asyncio.Task] = None
+
+
+def _generate_batch(count: int = _POOL_SIZE) -> List[str]:
+    """Generate a batch of tokens equivalent to secrets.token_urlsafe(TOKEN_BYTES)"""
+    raw = os.urandom(TOKEN_BYTES * count)
+    return [
+        base64.urlsafe_b64encode(raw[i:i + TOKEN_BYTES]).rstrip(b"=").decode("ascii")
+        for i in range(0, len(raw), TOKEN_BYTES)
+    ]
+
+
+def fill_token_pool():
+    """Top the pool up with a fresh batch of tokens"""
+    _token_pool.extend(_generate_batch())
+
+
+async def _refill():
+    """Refill the pool off the event loop"""
+    global _refill_task
+    try:
+        _token_pool.extend(await asyncio.to_thread(_generate_batch))
+    finally:
+        _refill_task = None
+
+
+def pooled_token_urlsafe() -> str:
+    """Take a single-use urlsafe token from the pool, scheduling a refill when low"""
+    global _refill_task
+    if not _token_pool:
+        fill_token_pool()
+    token = _token_pool.popleft()
+
+    if len(_token_pool) < _LOW_WATERMARK and _refill_task is None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            fill_token_pool()
+        else:
+            _refill_task = loop.create_task(_refill())
+    return token
@@ -6,6 +6,7 @@ Modern Streamlit frontend with professional design and Google Calendar integrati
 import streamlit as st
 import requests
 import os
+import json
 from datetime import datetime
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
@@ -22,6 +23,9 @@ API_ENDPOINTS = {
     'oauth_token': f'{API_BASE_URL}/api/v1/oauth/token',
     'oauth_status': f'{API_BASE_URL}/api/v1/oauth/status',
     'ai_chat': f'{API_BASE_URL}/api/v1/ai/chat',
+    'ai_chat_stream': f'{API_BASE_URL}/api/v1/ai/chat/stream',
+    'ai_switch_provider': f'{API_BASE_URL}/api/v1/ai/switch-provider',
+    'ai_test_key': f'{API_BASE_URL}/api/v1/ai/test-key',
     'ai_extract': f'{API_BASE_URL}/api/v1/ai/extract-meeting',
     'ai_status': f'{API_BASE_URL}/api/v1/ai/status',
     'calendar_events': f'{API_BASE_URL}/api/v1/calendar/events',
@@ -163,6 +167,30 @@ class APIClient:
                 self.enable_fallback_mode()
             return self.get_fallback_post_response(endpoint, data)
 
+    def post_stream(self, endpoint: str, data: Dict[str, Any], on_text) -> Optional[Dict[str, Any]]:
+        """POST to a Server-Sent Events endpoint, passing the reply text so far to on_text as it arrives"""
+        if self.fallback_mode:
+            return None
+        try:
+            with self.session.post(endpoint, json=data, headers=self._get_headers(), stream=True, timeout=30) as response:
+                if response.status_code != 200 or not response.headers.get('content-type', '').startswith('text/event-stream'):
+                    return None
+                text = ''
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith('data: '):
+                        continue
+                    event = json.loads(line[6:])
+                    if event.get('delta'):
+                        text += event['delta']
+                        on_text(text)
+                    if event.get('done'):
+                        event['response'] = text
+                        event['success'] = True
+                        return event
+        except Exception:
+            return None
+        return None
+
 # Initialize API client
 api_client = APIClient()
 
@@ -805,11 +833,9 @@ def render_ai_provider_settings():
             if st.button("🔍 Test", use_container_width=True, key=f"test_{selected_provider}"):
                 if api_key:
                     # Test the API key
-                    test_response = api_client.post(API_ENDPOINTS['ai_chat'], {
-                        'message': 'Hello',
+                    test_response = api_client.post(API_ENDPOINTS['ai_test_key'], {
                         'provider': selected_provider,
-                        'api_key': api_key,
-                        'test_mode': True
+                        'api_key': api_key
                     })
 
                     if test_response and test_response.get('success'):
@@ -823,8 +849,7 @@ def render_ai_provider_settings():
             if st.button("💾 Save & Use", use_container_width=True, key=f"save_{selected_provider}"):
                 if api_key:
                     # Save and switch to this provider
-                    switch_response = api_client.post(API_ENDPOINTS['ai_chat'], {
-                        'action': 'switch_provider',
+                    switch_response = api_client.post(API_ENDPOINTS['ai_switch_provider'], {
                         'provider': selected_provider,
                         'api_key': api_key
                     })
@@ -839,8 +864,7 @@ def render_ai_provider_settings():
     else:
         # Demo mode - just switch
         if st.button("🎯 Use Demo Mode", use_container_width=True, key="use_demo"):
-            switch_response = api_client.post(API_ENDPOINTS['ai_chat'], {
-                'action': 'switch_provider',
+            switch_response = api_client.post(API_ENDPOINTS['ai_switch_provider'], {
                 'provider': 'demo'
             })
 
@@ -1090,8 +1114,18 @@ def main():
                     'calendar_connected': st.session_state.google_calendar_connected
                 }
 
-                # Get AI response
-                ai_response = api_client.post(API_ENDPOINTS['ai_chat'], chat_request)
+                # Stream the AI response as it is generated, falling back to the blocking endpoint
+                stream_placeholder = st.empty()
+                ai_response = api_client.post_stream(
+                    API_ENDPOINTS['ai_chat_stream'],
+                    chat_request,
+                    lambda text: stream_placeholder.markdown(
+                        f'<div class="assistant-message">🤖 {text}</div>', unsafe_allow_html=True
+                    )
+                )
+                stream_placeholder.empty()
+                if not ai_response:
+                    ai_response = api_client.post(API_ENDPOINTS['ai_chat'], chat_request)
 
                 if ai_response:
                     response_text = ai_response.get('response', 'I apologize, but I couldn\'t generate a response.')
@@ -1107,19 +1141,24 @@ def main():
                     # Handle actions
                     if action == "CREATE_EVENT" and st.session_state.google_calendar_connected:
                         with st.spinner("📅 Creating calendar event..."):
-                            # Extract meeting information
-                            extract_request = {
-                                'chat_history': [
-                                    {
-                                        'role': msg['role'],
-                                        'content': msg['content'],
-                                        'timestamp': msg['timestamp'].isoformat() if isinstance(msg['timestamp'], datetime) else str(msg['timestamp'])
-                                    }
-                                    for msg in st.session_state.messages
-                                ]
-                            }
-
-                            extraction_response = api_client.post(API_ENDPOINTS['ai_extract'], extract_request)
+                            # Use the meeting details returned with the chat reply when complete
+                            chat_meeting_info = ai_response.get('meeting_info') or {}
+                            if chat_meeting_info.get('date') and chat_meeting_info.get('start_time'):
+                                extraction_response = {'success': True, 'meeting_info': chat_meeting_info}
+                            else:
+                                # Extract meeting information
+                                extract_request = {
+                                    'chat_history': [
+                                        {
+                                            'role': msg['role'],
+                                            'content': msg['content'],
+                                            'timestamp': msg['timestamp'].isoformat() if isinstance(msg['timestamp'], datetime) else str(msg['timestamp'])
+                                        }
+                                        for msg in st.session_state.messages
+                                    ]
+                                }
+
+                                extraction_response = api_client.post(API_ENDPOINTS['ai_extract'], extract_request)
 
                             if extraction_response and extraction_response.get('success'):
                                 meeting_info = extraction_response.get('meeting_info')